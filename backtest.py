@@ -0,0 +1,259 @@
+"""Replay archived signals against historical option prices.
+
+Usage: python backtest.py TWEETS PRICES [--workers N] [--top 10]
+
+TWEETS is a CSV or Parquet file with `created_at` and `text` columns.
+PRICES is a CSV or Parquet file with `timestamp`, `symbol`, `expiry`
+(YYYYMMDD), `strike`, `right` ('C'/'P') and `price` columns.
+"""
+from concurrent.futures import ProcessPoolExecutor
+import argparse
+import itertools
+import os
+import numpy as np
+import pandas as pd
+import config
+from tweet_parser import TweetParser
+
+MULTIPLIER = 100  # Option contract multiplier
+EPOCH = pd.Timestamp('1970-01-01', tz='UTC')
+
+
+def load_frame(path):
+    if str(path).endswith('.parquet'):
+        return pd.read_parquet(path)
+    return pd.read_csv(path)
+
+
+def load_price_paths(path):
+    """Load option prices into {(symbol, expiry, strike, right): (epoch_seconds, prices)}"""
+    prices = load_frame(path)
+    prices['timestamp'] = pd.to_datetime(prices['timestamp'], utc=True)
+    prices['expiry'] = prices['expiry'].astype(str)
+    prices['strike'] = prices['strike'].astype(float)
+    prices = prices.sort_values('timestamp')
+    paths = {}
+    for (symbol, expiry, strike, right), group in prices.groupby(['symbol', 'expiry', 'strike', 'right']):
+        times = (group['timestamp'] - EPOCH).dt.total_seconds().to_numpy()
+        paths[(symbol.upper(), expiry, strike, right[0].upper())] = (times, group['price'].to_numpy(float))
+    return paths
+
+
+def load_signals(path, paths):
+    """Parse the tweet archive and pair every signal with its contract's price path.
+
+    Returns a list of (times, prices, signal_time, target_price) tuples; signals
+    without price history are skipped.
+    """
+    tweets = load_frame(path)
+    created = pd.to_datetime(tweets['created_at'], utc=True)
+    tweet_parser = TweetParser()
+    signals = []
+    for text, created_at in zip(tweets['text'], created):
+        for signal in tweet_parser.parse_all(text, created_at.year):
+            path = paths.get((signal.symbol, signal.expiry, signal.strike, signal.right))
+            if path is None:
+                continue
+            signal_time = (created_at - EPOCH).total_seconds()
+            times, prices = path
+            start = np.searchsorted(times, signal_time)
+            if start < len(times):
+                signals.append((times[start:], prices[start:], signal_time, signal.target_price))
+    return signals
+
+
+def param_grid(profit_targets=None, average_down_threshold=None, trailing_stop_percentage=None,
+               price_margin=None, max_contracts=None, max_wait_time=None):
+    """Cartesian product of parameter values as a dict of arrays (one row per combination).
+
+    Any parameter left as None is fixed at its config value. profit_targets
+    values are (target1, target2, target3) tuples.
+    """
+    axes = {
+        'profit_targets': profit_targets or [tuple(config.PROFIT_TARGETS.values())],
+        'average_down_threshold': average_down_threshold or [config.AVERAGE_DOWN_THRESHOLD],
+        'trailing_stop_percentage': trailing_stop_percentage or [config.TRAILING_STOP_PERCENTAGE],
+        'price_margin': price_margin or [config.PRICE_MARGIN],
+        'max_contracts': max_contracts or [config.MAX_CONTRACTS],
+        'max_wait_time': max_wait_time or [config.MAX_WAIT_TIME],
+    }
+    rows = list(itertools.product(*axes.values()))
+    grid = {name: np.array([row[i] for row in rows]) for i, name in enumerate(axes)}
+    grid['profit_targets'] = np.sort(grid['profit_targets'].astype(float), axis=1)
+    grid['max_contracts'] = grid['max_contracts'].astype(int)
+    return grid
+
+
+def first_true(mask):
+    """Index of the first True in each row, or the row length if there is none"""
+    return np.where(mask.any(axis=1), mask.argmax(axis=1), mask.shape[1])
+
+
+def lot_exits(prices, high, quantity, average, start, params, max_lots):
+    """Exit index and price of every lot under the current exit ladder.
+
+    Mirrors Trader.exit_orders: with 3+ contracts one lot sells at each
+    profit target, with 2 one sells at target2, and every lot also carries
+    the stop in the same OCA group, so it exits at whichever comes first.
+    Returns (C, max_lots) arrays; lots that do not exist or never exit get
+    index T.
+    """
+    count, steps = len(quantity), len(prices)
+    index = np.arange(steps)
+    after = index[None, :] > start[:, None]
+    targets = params['profit_targets']
+    stop_hit = after & (prices[None, :] <= high * (1 - params['trailing_stop_percentage'])[:, None])
+    stop_idx = first_true(stop_hit)
+
+    exit_idx = np.full((count, max_lots), steps)
+    exit_price = np.zeros((count, max_lots))
+    for lot in range(max_lots):
+        exists = quantity > lot
+        # Target percentage of this lot, NaN when it rides the trailing stop
+        pct = np.full(count, np.nan)
+        ladder = quantity >= 3
+        if lot < targets.shape[1]:
+            pct[ladder] = targets[ladder, lot]
+        if lot == 0:
+            pct[quantity == 2] = targets[quantity == 2, 1]
+        has_target = exists & ~np.isnan(pct)
+        target_price = average * (1 + np.nan_to_num(pct))
+        target_idx = first_true(after & has_target[:, None] & (prices[None, :] >= target_price[:, None]))
+
+        at_target = has_target & (target_idx <= stop_idx)
+        lot_idx = np.where(exists, np.where(at_target, target_idx, stop_idx), steps)
+        exit_idx[:, lot] = lot_idx
+        exit_price[:, lot] = np.where(at_target, target_price, prices[np.minimum(lot_idx, steps - 1)])
+    return exit_idx, exit_price
+
+
+def simulate_signal(times, prices, signal_time, target_price, params):
+    """Simulate one signal under every parameter combination at once.
+
+    Returns (pnl, entered) arrays with one value per combination. Averaging
+    down is only considered until the first exit fills; positions still open
+    at the end of the price history are marked at the last price.
+    """
+    steps = len(prices)
+    index = np.arange(steps)
+    initial = config.POSITION_SIZES['initial']
+    add_size = config.POSITION_SIZES['average']
+
+    # Entry: first price at or below target + margin inside the wait window
+    elapsed = times - signal_time
+    in_window = elapsed[None, :] <= params['max_wait_time'][:, None] * 60
+    entry_hit = in_window & (prices[None, :] <= (target_price + params['price_margin'])[:, None])
+    entry_idx = first_true(entry_hit)
+    entered = entry_idx < steps
+    entry_price = prices[np.minimum(entry_idx, steps - 1)]
+
+    # High-water mark since entry, for the trailing stop
+    since_entry = index[None, :] >= entry_idx[:, None]
+    high = np.maximum.accumulate(np.where(since_entry, prices[None, :], -np.inf), axis=1)
+
+    quantity = np.where(entered, initial, 0)
+    cost = entry_price * quantity
+    average = entry_price.copy()
+    ladder_start = entry_idx.copy()
+    max_lots = int(params['max_contracts'].max())
+
+    # Average down while the price falls through the threshold before any exit fills
+    for _ in range(max_lots):
+        can_add = entered & (quantity + add_size <= params['max_contracts'])
+        if not can_add.any():
+            break
+        threshold = average * (1 + params['average_down_threshold'])
+        add_hit = (index[None, :] > ladder_start[:, None]) & (prices[None, :] <= threshold[:, None])
+        add_idx = np.where(can_add, first_true(add_hit), steps)
+        exit_idx, _ = lot_exits(prices, high, quantity, average, ladder_start, params, max_lots)
+        added = add_idx < np.minimum(exit_idx.min(axis=1), steps)
+        if not added.any():
+            break
+        add_price = prices[np.minimum(add_idx, steps - 1)]
+        quantity = np.where(added, quantity + add_size, quantity)
+        cost = np.where(added, cost + add_price * add_size, cost)
+        average = np.where(added, cost / np.maximum(quantity, 1), average)
+        ladder_start = np.where(added, add_idx, ladder_start)
+
+    exit_idx, exit_price = lot_exits(prices, high, quantity, average, ladder_start, params, max_lots)
+    lots = np.arange(max_lots)[None, :] < quantity[:, None]
+    exit_price = np.where(exit_idx < steps, exit_price, prices[-1])
+    pnl = ((exit_price - average[:, None]) * lots).sum(axis=1) * MULTIPLIER
+    return np.where(entered, pnl, 0.0), entered
+
+
+def simulate(signals, params):
+    """Total P&L, trades and winners per combination over all signals"""
+    count = len(params['price_margin'])
+    total = np.zeros(count)
+    trades = np.zeros(count, dtype=int)
+    winners = np.zeros(count, dtype=int)
+    for times, prices, signal_time, target_price in signals:
+        pnl, entered = simulate_signal(times, prices, signal_time, target_price, params)
+        total += pnl
+        trades += entered
+        winners += pnl > 0
+    return total, trades, winners
+
+
+_worker_signals = None
+
+
+def _init_worker(signals):
+    global _worker_signals
+    _worker_signals = signals
+
+
+def _simulate_chunk(params):
+    return simulate(_worker_signals, params)
+
+
+def run_sweep(signals, grid, workers=None, chunk_size=256):
+    """Simulate every combination in the grid across a process pool; returns a DataFrame"""
+    count = len(grid['price_margin'])
+    chunks = [
+        {name: values[start:start + chunk_size] for name, values in grid.items()}
+        for start in range(0, count, chunk_size)
+    ]
+    with ProcessPoolExecutor(max_workers=workers, initializer=_init_worker,
+                             initargs=(signals,)) as pool:
+        results = list(pool.map(_simulate_chunk, chunks))
+
+    total = np.concatenate([r[0] for r in results])
+    trades = np.concatenate([r[1] for r in results])
+    winners = np.concatenate([r[2] for r in results])
+    frame = pd.DataFrame({name: list(values) if values.ndim > 1 else values
+                          for name, values in grid.items()})
+    frame['total_pnl'] = total
+    frame['trades'] = trades
+    frame['win_rate'] = np.divide(winners, trades, out=np.zeros(count), where=trades > 0)
+    return frame.sort_values('total_pnl', ascending=False, ignore_index=True)
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument('tweets')
+    parser.add_argument('prices')
+    parser.add_argument('--workers', type=int, default=os.cpu_count())
+    parser.add_argument('--top', type=int, default=10)
+    args = parser.parse_args()
+
+    paths = load_price_paths(args.prices)
+    signals = load_signals(args.tweets, paths)
+    print(f"Loaded {len(signals)} signals with price history")
+
+    # Sweep around the live configuration
+    grid = param_grid(
+        profit_targets=[(0.10, 0.20, 0.40), (0.15, 0.30, 0.50), (0.20, 0.40, 0.75)],
+        average_down_threshold=[-0.2, -0.3, -0.4, -0.5, -1.0],
+        trailing_stop_percentage=[0.05, 0.10, 0.15, 0.20, 0.30],
+        price_margin=[0.0, 0.02, 0.05, 0.10],
+        max_contracts=[1, 2, 3],
+        max_wait_time=[5, 15, 30, 60],
+    )
+    results = run_sweep(signals, grid, workers=args.workers)
+    print(results.head(args.top).to_string())
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,94 @@
+"""Microbenchmark for TweetParser over a synthetic tweet corpus.
+
+Usage: python bench_parser.py [--count 1000000] [--signal-ratio 0.05]
+"""
+import argparse
+import random
+import re
+import time
+from datetime import datetime
+from tweet_parser import TweetParser
+
+SYMBOLS = ['SPY', 'QQQ', 'AAPL', 'TSLA', 'NVDA', 'AMZN', 'META', 'IWM']
+NOISE = [
+    "Market looking choppy today, sitting on my hands",
+    "Great call yesterday everyone, congrats to those who took profits",
+    "Watching $SPY closely into the close",
+    "CPI tomorrow at 8:30, expect volatility",
+    "Reminder: size down on FOMC days 6/12",
+    "Not financial advice. Trade your own plan.",
+    "gm",
+]
+
+
+def make_signal(rng):
+    symbol = rng.choice(SYMBOLS)
+    month, day = rng.randint(1, 12), rng.randint(1, 28)
+    strike = rng.choice([rng.randint(50, 700), rng.randint(50, 700) + 0.5])
+    right = rng.choice('cCpP')
+    price = round(rng.uniform(0.05, 12), 2)
+    year = rng.choice(['', f"/{rng.randint(26, 27)}"])
+    if rng.random() < 0.5:
+        return f"${symbol} {month}/{day}{year} {strike}{right} @ {price}"
+    return f"{symbol} {strike}{right.upper()} {month}/{day}{year} {price}"
+
+
+def make_corpus(count, signal_ratio, seed=0):
+    rng = random.Random(seed)
+    corpus = []
+    for _ in range(count):
+        r = rng.random()
+        if r < signal_ratio * 0.8:
+            corpus.append(f"Entry: {make_signal(rng)} let's go")
+        elif r < signal_ratio:
+            corpus.append(f"Two plays: {make_signal(rng)} and {make_signal(rng)}")
+        else:
+            corpus.append(rng.choice(NOISE))
+    return corpus
+
+
+def baseline_parse(tweet_text):
+    """The original per-call re.search parser, kept for comparison"""
+    pattern = r'\$(\w+)\s+(\d+)/(\d+)\s+(\d+)([cp])\s+@\s+(\d+\.?\d*)'
+    match = re.search(pattern, tweet_text)
+    if not match:
+        return None
+    symbol, month, day, strike, option_type, price = match.groups()
+    try:
+        expiration_date = datetime(datetime.now().year, int(month), int(day))
+    except ValueError:
+        return None
+    return {
+        'symbol': symbol,
+        'expiration_date': expiration_date,
+        'strike_price': float(strike),
+        'option_type': 'call' if option_type == 'c' else 'put',
+        'target_price': float(price)
+    }
+
+
+def run(label, func, corpus):
+    start = time.perf_counter()
+    found = func(corpus)
+    elapsed = time.perf_counter() - start
+    print(f"{label:<12} {len(corpus) / elapsed:>12,.0f} tweets/s  "
+          f"{elapsed:6.2f}s  {found:,} signals")
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument('--count', type=int, default=1_000_000)
+    parser.add_argument('--signal-ratio', type=float, default=0.05)
+    args = parser.parse_args()
+
+    print(f"Building corpus of {args.count:,} tweets...")
+    corpus = make_corpus(args.count, args.signal_ratio)
+    tweet_parser = TweetParser()
+
+    run('baseline', lambda texts: sum(1 for t in texts if baseline_parse(t)), corpus)
+    run('first', lambda texts: sum(1 for t in texts if tweet_parser.parse_option_signal(t)), corpus)
+    run('parse_many', lambda texts: sum(map(len, tweet_parser.parse_many(texts))), corpus)
+
+
+if __name__ == "__main__":
+    main()
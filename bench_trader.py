@@ -0,0 +1,92 @@
+"""Load benchmark for the signal pipeline and Trader against the simulated broker.
+
+Usage: python bench_trader.py [--bursts 5] [--burst-size 200] [--gap 1.0] [--contracts 40]
+                             [--volatility 0.0]
+
+Fires bursts of synthetic signal tweets through SignalPipeline ->
+Trader.execute_option_trade backed by fake_broker.FakeIB, then reports
+throughput, per-stage tail latency and peak memory. No TWS connection needed.
+"""
+import argparse
+import asyncio
+import json
+import logging
+import time
+import tracemalloc
+from datetime import datetime
+from fake_broker import FakeIB
+from latency import recorder
+from pipeline import SignalPipeline
+from risk_engine import RiskEngine
+from trader import Trader
+from tweet_parser import TweetParser
+
+
+def make_tweets(count, contracts):
+    """Signal tweets spread over `contracts` strikes, priced at the fake broker's 3.00"""
+    expiry = datetime(datetime.now().year + 1, 1, 17)
+    return [
+        f"$SPY {expiry.month}/{expiry.day}/{expiry.year} {500 + i % contracts}c @ 3.00"
+        for i in range(count)
+    ]
+
+
+async def drain(pipeline):
+    """Wait until every queued signal has been executed"""
+    for queue in (pipeline.ingest_queue, pipeline.validate_queue, pipeline.execute_queue):
+        await queue.join()
+    while pipeline.in_flight:
+        await asyncio.gather(*list(pipeline.in_flight), return_exceptions=True)
+
+
+async def run(args):
+    loop = asyncio.get_event_loop()
+    ib = FakeIB(volatility=args.volatility)
+    trader = Trader(ib=ib, contract_cache_path=':memory:', journal_path=':memory:')
+    trader.risk = RiskEngine()  # No limits; every signal should trade
+    trader.initialize_client()
+    pipeline = SignalPipeline(TweetParser(), trader, queue_size=args.burst_size,
+                              max_in_flight=args.burst_size)
+    pipeline.start(loop)
+
+    tweets = make_tweets(args.bursts * args.burst_size, args.contracts)
+    tracemalloc.start()
+    started = time.perf_counter()
+    for burst in range(args.bursts):
+        for text in tweets[burst * args.burst_size:(burst + 1) * args.burst_size]:
+            await pipeline.put(text)
+        await drain(pipeline)
+        if burst < args.bursts - 1:
+            await asyncio.sleep(args.gap)
+    elapsed = time.perf_counter() - started - args.gap * (args.bursts - 1)
+    _, peak = tracemalloc.get_traced_memory()
+    tracemalloc.stop()
+
+    pipeline.stop()
+    trader.cleanup()
+
+    entries = len(trader.positions)
+    print(f"Signals:     {len(tweets)} in {args.bursts} bursts of {args.burst_size}")
+    print(f"Positions:   {entries} contracts, {int(trader.positions.quantity.sum())} lots")
+    print(f"Throughput:  {len(tweets) / elapsed:,.0f} signals/s (excluding gaps)")
+    print(f"Peak memory: {peak / 1024 / 1024:.1f} MiB")
+    print("Latency by stage:")
+    print(json.dumps(recorder.snapshot()['stages'], indent=2))
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument('--bursts', type=int, default=5)
+    parser.add_argument('--burst-size', type=int, default=200)
+    parser.add_argument('--gap', type=float, default=1.0, help="Seconds between bursts")
+    parser.add_argument('--contracts', type=int, default=40, help="Distinct option contracts")
+    parser.add_argument('--volatility', type=float, default=0.0,
+                        help="Per-tick price noise; above 0 some entries wait for the price to return")
+    args = parser.parse_args()
+
+    logging.getLogger().setLevel(logging.WARNING)
+    asyncio.run(run(args))
+
+
+if __name__ == "__main__":
+    main()
@@ -9,6 +9,35 @@ TWITTER_API_KEY = os.getenv('TWITTER_API_KEY')
 TWITTER_API_SECRET = os.getenv('TWITTER_API_SECRET')
 TWITTER_ACCESS_TOKEN = os.getenv('TWITTER_ACCESS_TOKEN')
 TWITTER_ACCESS_TOKEN_SECRET = os.getenv('TWITTER_ACCESS_TOKEN_SECRET')
+TWITTER_BEARER_TOKEN = os.getenv('TWITTER_BEARER_TOKEN')
+
+# Interactive Brokers connection
+IB_HOST = os.getenv('IB_HOST', '127.0.0.1')
+IB_PORT = int(os.getenv('IB_PORT', '7497'))  # 7497 is the paper trading port
+IB_CLIENT_ID = int(os.getenv('IB_CLIENT_ID', '1'))
+SHARD_COUNT = int(os.getenv('SHARD_COUNT', '1'))  # Execution processes, sharded by underlying; shard N uses IB_CLIENT_ID + N
+
+# Market data settings
+QUOTE_MAX_LINES = 90  # Streaming subscriptions kept open, below IB's default 100 line limit
+QUOTE_WAIT_TIMEOUT = 2  # Seconds to wait for the first tick of a new subscription
+CONTRACT_CACHE_PATH = os.getenv('CONTRACT_CACHE_PATH', 'contracts.db')  # SQLite file for qualified contracts
+CONTRACT_CACHE_TTL_DAYS = 7  # Re-qualify cached contracts after this many days
+JOURNAL_PATH = os.getenv('JOURNAL_PATH', 'positions.db')  # SQLite journal used to restore positions on restart
+
+# Logging settings
+LOG_LEVEL = os.getenv('LOG_LEVEL', 'INFO')
+LOG_PATH = os.getenv('LOG_PATH', 'trading.log')
+TRADE_JOURNAL_PATH = os.getenv('TRADE_JOURNAL_PATH', 'trades.jsonl')  # JSON lines of signals and orders, empty to disable
+TWEET_LOG_SAMPLE_RATE = 100  # Log one in this many tweets that carry no signal
+
+# Request scheduler settings (IB allows about 50 messages per second)
+SCHEDULER_RATE = 45  # Messages per second sent to IB
+SCHEDULER_BURST = 10  # Messages that may be sent back to back after a quiet period
+SCHEDULER_RESERVE = 2  # Tokens only orders and cancels may use, so they never queue behind quotes
+
+# Order settings
+ORDER_ACK_TIMEOUT = 5  # Seconds to wait for the broker to acknowledge an order
+ORDER_FILL_TIMEOUT = 5  # Seconds an entry limit order may rest before the remainder is cancelled
 
 # TD Ameritrade API credentials
 TDA_CLIENT_ID = os.getenv('TDA_CLIENT_ID')
@@ -19,5 +48,60 @@ TDA_TOKEN_PATH = os.getenv('TDA_TOKEN_PATH')
 MAX_POSITION_SIZE = 1  # Maximum number of contracts per trade
 ACCOUNT_ID = os.getenv('TDA_ACCOUNT_ID')  # Your TD Ameritrade account ID
 
+# Strategy settings
+PROFIT_TARGETS = {
+    'target1': 0.15,  # 15% profit
+    'target2': 0.30,  # 30% profit
+    'target3': 0.50   # 50% profit
+}
+AVERAGE_DOWN_THRESHOLD = -0.40  # 40% down triggers averaging down
+POSITION_SIZES = {
+    'initial': 1,     # Start with 1 contract
+    'average': 1      # Add 1 contract at a time
+}
+MAX_CONTRACTS = 3  # Maximum number of contracts
+MAX_WAIT_TIME = 30  # Maximum wait time in minutes
+ENTRY_RETRY_DELAY = 60  # Seconds before an entry that did not fill waits for the price again
+PRICE_MARGIN = 0.02  # Maximum price deviation in dollars
+TRAILING_STOP_PERCENTAGE = 0.10  # 10% trailing stop
+TRAILING_STOP_MODE = os.getenv('TRAILING_STOP_MODE', 'native')  # 'native' IB TRAIL orders, or 'client' to raise STP orders from ticks
+TRAILING_STOP_LIMIT_OFFSET = 0  # Native mode: dollars between stop and limit for a TRAIL LIMIT order, 0 for a plain TRAIL
+TRAILING_STOP_AMEND_INTERVAL = 0.5  # Client mode: seconds between batches of stop amendments
+TRAILING_STOP_MAX_AMENDS = 20  # Client mode: most stop orders modified per batch
+
+# Risk limits (0 disables a limit); premium is dollars paid for open contracts.
+# With SHARD_COUNT > 1 each shard gets an equal share of the account-wide and per-expiry limits.
+RISK_MAX_CONTRACTS_PER_UNDERLYING = 10  # Open contracts on one underlying
+RISK_MAX_PREMIUM_PER_UNDERLYING = 5000  # Premium at risk on one underlying
+RISK_MAX_CONTRACTS_PER_EXPIRY = 20  # Open contracts expiring on one date
+RISK_MAX_PREMIUM_PER_EXPIRY = 10000  # Premium at risk expiring on one date
+RISK_MAX_CONTRACTS = 50  # Open contracts across the account
+RISK_MAX_PREMIUM = 25000  # Premium at risk across the account
+RISK_MAX_DAILY_LOSS = 2000  # Stop opening positions once today's realized loss reaches this
+RISK_MAX_SIGNALS_PER_SOURCE = 50  # Ignore an account's signals after this many today
+RISK_RECHECK_INTERVAL = 300  # Seconds before an average-down blocked by the limits is tried again
+
 # Twitter settings
-TARGET_USER_IDS = []  # Add target Twitter user IDs here 
\ No newline at end of file
+TARGET_USER_IDS = []  # Add target Twitter user IDs here
+WATCHLIST_PATH = os.getenv('WATCHLIST_PATH', '')  # File of extra user IDs, one per line, reloaded while running
+WATCHLIST_RELOAD_INTERVAL = 30  # Seconds between checks of the watchlist file for changes
+STREAM_RULE_MAX_LENGTH = 512  # Maximum length of one stream rule
+STREAM_MAX_RULES = 25  # Maximum stream rules allowed on the account
+
+# twitterapi.io polling settings
+TWITTERAPI_IO_KEY = os.getenv('IO_KEY')
+TWITTERAPI_IO_USERS = []  # Add target Twitter usernames to poll here
+POLL_INTERVAL = 60  # Seconds between polls
+POLL_MAX_QUERY_LENGTH = 500  # Maximum search query length per batch of users
+
+# Signal pipeline settings
+PIPELINE_QUEUE_SIZE = 100  # Maximum queued items per pipeline stage
+PIPELINE_MAX_IN_FLIGHT = 20  # Maximum signals being executed at once
+PIPELINE_SUBMIT_TIMEOUT = 5  # Seconds the stream thread waits on a full queue before dropping a tweet
+INGEST_DEDUPE_WINDOW = 600  # Seconds a tweet ID or signal is remembered to drop copies from the other source
+INGEST_DEDUPE_MAX_SIZE = 10000  # Most tweet IDs / signals remembered at once
+
+# Latency metrics settings
+METRICS_PORT = int(os.getenv('METRICS_PORT', '0'))  # Serve per-stage latencies over HTTP on this port, 0 to disable
+METRICS_DUMP_PATH = os.getenv('METRICS_DUMP_PATH', 'latency.json')  # Periodic JSON dump, empty to disable
+METRICS_DUMP_INTERVAL = 60  # Seconds between JSON dumps
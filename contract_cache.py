@@ -0,0 +1,120 @@
+from datetime import datetime, timedelta
+from ib_insync import Contract, Option
+import dataclasses
+import json
+import logging
+import sqlite3
+import time
+from request_scheduler import ENTRY, RequestScheduler
+
+logger = logging.getLogger(__name__)
+
+
+class ContractCache:
+    """Qualified option contracts keyed by (symbol, expiry, strike, right).
+
+    Lookups hit an in-memory dict first and a SQLite file second, so a
+    contract qualified once is never sent to the broker again, even after a
+    restart. Entries expire at the end of the contract's expiry day or after
+    ``ttl_days``, whichever comes first.
+    """
+
+    def __init__(self, ib, path='contracts.db', ttl_days=7, scheduler=None):
+        self.ib = ib
+        self.scheduler = scheduler or RequestScheduler()
+        self.ttl = ttl_days * 86400
+        self.memory = {}  # key -> (Contract, expires_at)
+        self.db = sqlite3.connect(path)
+        self.db.execute(
+            "CREATE TABLE IF NOT EXISTS contracts ("
+            "symbol TEXT, expiry TEXT, strike REAL, right TEXT, "
+            "con_id INTEGER, details TEXT, expires_at REAL, "
+            "PRIMARY KEY (symbol, expiry, strike, right))"
+        )
+        self.db.commit()
+        self.purge_expired()
+
+    @staticmethod
+    def make_key(symbol, expiry, strike, right):
+        """Normalize contract fields so 'call'/'C' and 595/595.0 share an entry"""
+        return (symbol.upper(), str(expiry), float(strike), right[0].upper())
+
+    def _expires_at(self, expiry):
+        limit = time.time() + self.ttl
+        try:
+            # Keep the entry until the end of the expiry day
+            end_of_day = datetime.strptime(expiry[:8], '%Y%m%d') + timedelta(days=1)
+            return min(limit, end_of_day.timestamp())
+        except ValueError:
+            return limit
+
+    def get(self, symbol, expiry, strike, right):
+        """Return the cached qualified contract, or None"""
+        key = self.make_key(symbol, expiry, strike, right)
+        now = time.time()
+
+        entry = self.memory.get(key)
+        if entry is not None:
+            contract, expires_at = entry
+            if expires_at > now:
+                return contract
+            del self.memory[key]
+
+        row = self.db.execute(
+            "SELECT details, expires_at FROM contracts "
+            "WHERE symbol=? AND expiry=? AND strike=? AND right=?", key
+        ).fetchone()
+        if row is None or row[1] <= now:
+            return None
+
+        contract = Contract.create(**json.loads(row[0]))
+        self.memory[key] = (contract, row[1])
+        return contract
+
+    def put(self, contract, key=None):
+        """Store a qualified contract under its own fields (or an explicit key)"""
+        if key is None:
+            key = self.make_key(contract.symbol, contract.lastTradeDateOrContractMonth,
+                                contract.strike, contract.right)
+        expires_at = self._expires_at(contract.lastTradeDateOrContractMonth)
+        self.memory[key] = (contract, expires_at)
+        self.db.execute(
+            "INSERT OR REPLACE INTO contracts VALUES (?, ?, ?, ?, ?, ?, ?)",
+            key + (contract.conId, json.dumps(dataclasses.asdict(contract)), expires_at)
+        )
+        self.db.commit()
+
+    async def resolve(self, symbol, expiry, strike, right):
+        """Return a qualified option contract, asking the broker only on a cache miss"""
+        contract = self.get(symbol, expiry, strike, right)
+        if contract is not None:
+            return contract
+
+        # Concurrent misses for the same contract share one request
+        requested = self.make_key(symbol, expiry, strike, right)
+        qualified = await self.scheduler.call(
+            ENTRY, self.ib.qualifyContractsAsync, Option(symbol, expiry, strike, right, 'SMART', '100'),
+            key=('qualify',) + requested
+        )
+        contract = qualified[0] if qualified else None
+        if contract is None or not contract.conId:
+            logger.warning("Could not qualify contract %s %s %s %s", symbol, expiry, strike, right)
+            return None
+
+        self.put(contract)
+        if requested not in self.memory:
+            # IB normalized a field (e.g. expiry format); remember the raw key too
+            self.put(contract, requested)
+        return contract
+
+    def purge_expired(self):
+        """Drop expired series from memory and disk"""
+        now = time.time()
+        self.memory = {k: v for k, v in self.memory.items() if v[1] > now}
+        deleted = self.db.execute("DELETE FROM contracts WHERE expires_at <= ?", (now,)).rowcount
+        self.db.commit()
+        if deleted:
+            logger.info("Purged %s expired contracts from cache", deleted)
+
+    def close(self):
+        self.db.close()
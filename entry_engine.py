@@ -0,0 +1,104 @@
+import asyncio
+import heapq
+import itertools
+import logging
+
+logger = logging.getLogger(__name__)
+
+
+class PendingEntry:
+    """A signal waiting for its contract to trade at or below limit_price"""
+    __slots__ = ('con_id', 'limit_price', 'deadline', 'future')
+
+    def __init__(self, con_id, limit_price, deadline, future):
+        self.con_id = con_id
+        self.limit_price = limit_price
+        self.deadline = deadline  # loop.time() after which the entry expires
+        self.future = future  # Resolves with the crossing price, or None on expiry
+
+
+class EntryEngine:
+    """Fires pending entries on the tick that reaches their price.
+
+    Pending entries are indexed by conId in a max-heap on limit price, so a
+    tick only touches its own contract and pops exactly the entries it
+    crosses. Expiry uses one deadline heap and a single timer set for the
+    earliest deadline; nothing runs between ticks however many entries wait.
+    Entries resolved either way stay in the other heap and are skipped
+    when they surface.
+    """
+
+    def __init__(self):
+        self.by_con_id = {}  # conId -> heap of (-limit_price, seq, PendingEntry)
+        self.deadlines = []  # heap of (deadline, seq, PendingEntry)
+        self.seq = itertools.count()
+        self._timer = None
+
+    def __len__(self):
+        return sum(not entry.future.done() for heap in self.by_con_id.values() for _, _, entry in heap)
+
+    def waiting(self, con_id):
+        """Whether any unresolved entry is waiting on a contract"""
+        return any(not entry.future.done() for _, _, entry in self.by_con_id.get(con_id, ()))
+
+    async def wait(self, con_id, limit_price, timeout, price=None):
+        """Wait until the contract trades at or below limit_price.
+
+        Returns the crossing price, or None after timeout seconds. A known
+        current price that already crosses returns immediately.
+        """
+        if price and price <= limit_price:
+            return price
+        loop = asyncio.get_event_loop()
+        entry = PendingEntry(con_id, limit_price, loop.time() + timeout, loop.create_future())
+        seq = next(self.seq)
+        heapq.heappush(self.by_con_id.setdefault(con_id, []), (-limit_price, seq, entry))
+        heapq.heappush(self.deadlines, (entry.deadline, seq, entry))
+        if self.deadlines[0][2] is entry:
+            self._schedule(loop)
+        try:
+            return await entry.future
+        finally:
+            if not entry.future.done():
+                entry.future.cancel()  # Caller was cancelled; let the heaps drop the entry
+
+    def on_tick(self, con_id, price):
+        """Fire every pending entry of a contract whose limit the price reaches"""
+        heap = self.by_con_id.get(con_id)
+        if not heap or not price or price != price:
+            return
+        while heap and -heap[0][0] >= price:
+            entry = heapq.heappop(heap)[2]
+            if not entry.future.done():
+                entry.future.set_result(price)
+        self._prune(con_id)
+
+    def _prune(self, con_id):
+        """Pop resolved entries off the top of a contract's heap"""
+        heap = self.by_con_id[con_id]
+        while heap and heap[0][2].future.done():
+            heapq.heappop(heap)
+        if not heap:
+            del self.by_con_id[con_id]
+
+    def _schedule(self, loop):
+        if self._timer is not None:
+            self._timer.cancel()
+        self._timer = loop.call_at(self.deadlines[0][0], self._expire, loop) if self.deadlines else None
+
+    def _expire(self, loop):
+        """Resolve every entry whose deadline has passed, then re-arm for the next one"""
+        now = loop.time()
+        expired = 0
+        while self.deadlines and (self.deadlines[0][0] <= now or self.deadlines[0][2].future.done()):
+            entry = heapq.heappop(self.deadlines)[2]
+            if not entry.future.done():
+                entry.future.set_result(None)
+                expired += 1
+        if expired:
+            logger.info("%s pending entries expired", expired)
+            # Drop the expired entries from their contracts' heaps
+            for con_id in [c for c, heap in self.by_con_id.items() if heap[0][2].future.done()]:
+                self._prune(con_id)
+        self._timer = None
+        self._schedule(loop)
@@ -0,0 +1,241 @@
+from datetime import datetime, timezone
+from ib_insync import (CommissionReport, Event, Execution, Fill, OrderStatus, Position,
+                       Ticker, Trade, TradeLogEntry)
+from ib_insync.util import UNSET_DOUBLE
+from types import SimpleNamespace
+import asyncio
+import itertools
+import random
+import zlib
+
+
+class FakeIB:
+    """Deterministic in-process stand-in for the parts of ``ib_insync.IB`` the Trader uses.
+
+    Supports ``qualifyContractsAsync``, ``reqMktData``/``cancelMktData``,
+    ``placeOrder``/``cancelOrder``, ``reqPositions``/``reqOpenOrders`` and the ``orderStatusEvent``,
+    ``execDetailsEvent`` and ``pendingTickersEvent`` events, using real
+    ib_insync Ticker/Trade objects. Prices follow a seeded random walk that
+    ticks every ``tick_interval`` seconds. Orders are acknowledged after
+    ``ack_latency`` seconds; limit orders fill ``fill_latency`` seconds after
+    the price crosses the limit, and stop and trailing stop orders once it
+    falls to the stop. Placing an order with the orderId of a working one
+    modifies it. Orders placed with ``transmit=False`` wait for the next
+    transmitted one, attached orders (``parentId``) only work once their
+    parent fills and are cancelled with it, and a fill cancels the rest of
+    its OCA group.
+    """
+
+    def __init__(self, seed=0, initial_price=3.0, volatility=0.01, tick_interval=0.1,
+                 qualify_latency=0.005, ack_latency=0.002, fill_latency=0.005):
+        self.rng = random.Random(seed)
+        self.initial_price = initial_price  # Price or callable(contract) -> price
+        self.volatility = volatility  # Relative standard deviation of each tick
+        self.tick_interval = tick_interval
+        self.qualify_latency = qualify_latency
+        self.ack_latency = ack_latency
+        self.fill_latency = fill_latency
+        self.prices = {}  # conId -> current price
+        self.tickers = {}  # conId -> Ticker
+        self.trades = {}  # orderId -> working Trade
+        self.filling = set()  # orderIds with a fill scheduled
+        self.held = []  # Trades placed with transmit=False, not yet sent
+        self.positions = {}  # conId -> Position
+        self.order_ids = itertools.count(1)
+        self.client = SimpleNamespace(getReqId=lambda: next(self.order_ids))
+        self.connected = False
+        self._tick_task = None
+
+        self.orderStatusEvent = Event('orderStatusEvent')
+        self.execDetailsEvent = Event('execDetailsEvent')
+        self.pendingTickersEvent = Event('pendingTickersEvent')
+
+    # Connection
+
+    def connect(self, host='127.0.0.1', port=7497, clientId=1, **kwargs):
+        self.connected = True
+
+    def isConnected(self):
+        return self.connected
+
+    def disconnect(self):
+        self.connected = False
+        if self._tick_task:
+            self._tick_task.cancel()
+            self._tick_task = None
+
+    # Contracts and market data
+
+    async def qualifyContractsAsync(self, *contracts):
+        await asyncio.sleep(self.qualify_latency)
+        for contract in contracts:
+            key = f"{contract.symbol}{contract.lastTradeDateOrContractMonth}{contract.strike}{contract.right}"
+            contract.conId = zlib.crc32(key.encode()) or 1
+            contract.localSymbol = key
+            contract.currency = contract.currency or 'USD'
+        return list(contracts)
+
+    def price(self, contract):
+        """Current simulated price of a contract"""
+        price = self.prices.get(contract.conId)
+        if price is None:
+            price = self.initial_price(contract) if callable(self.initial_price) else self.initial_price
+            self.prices[contract.conId] = price
+        return price
+
+    def set_price(self, contract, price):
+        """Force a contract's price, e.g. to trigger entries or stops in a test"""
+        self.prices[contract.conId] = price
+        self._publish([contract.conId])
+
+    def reqMktData(self, contract, *args, **kwargs):
+        ticker = self.tickers.get(contract.conId)
+        if ticker is None:
+            ticker = Ticker(contract=contract)
+            self.tickers[contract.conId] = ticker
+            self.price(contract)
+            # Deliver the first tick asynchronously, like the real API
+            asyncio.get_event_loop().call_soon(self._publish, [contract.conId])
+        if self._tick_task is None:
+            self._tick_task = asyncio.ensure_future(self._tick_loop())
+        return ticker
+
+    def cancelMktData(self, contract):
+        self.tickers.pop(contract.conId, None)
+
+    async def _tick_loop(self):
+        while True:
+            await asyncio.sleep(self.tick_interval)
+            for con_id in self.tickers:
+                move = 1 + self.rng.gauss(0, self.volatility)
+                self.prices[con_id] = max(0.01, round(self.prices[con_id] * move, 2))
+            self._publish(list(self.tickers))
+
+    def _publish(self, con_ids):
+        now = datetime.now(timezone.utc)
+        updated = set()
+        for con_id in con_ids:
+            ticker = self.tickers.get(con_id)
+            price = self.prices.get(con_id)
+            if ticker is None or price is None:
+                continue
+            ticker.time = now
+            ticker.last = price
+            ticker.bid = round(max(0.01, price - 0.01), 2)
+            ticker.ask = round(price + 0.01, 2)
+            ticker.updateEvent.emit(ticker)
+            updated.add(ticker)
+        if updated:
+            self.pendingTickersEvent.emit(updated)
+            self._match_orders()
+
+    # Orders
+
+    def reqPositions(self):
+        return [p for p in self.positions.values() if p.position]
+
+    def reqOpenOrders(self):
+        return list(self.trades.values())
+
+    def placeOrder(self, contract, order):
+        trade = self.trades.get(order.orderId)
+        if trade is not None:
+            # Modification of a working order, e.g. a raised stop
+            trade.order = order
+            trade.log.append(TradeLogEntry(datetime.now(timezone.utc), trade.orderStatus.status, 'Modify'))
+            asyncio.get_event_loop().call_later(self.ack_latency, self._match_orders)
+            return trade
+        if not order.orderId:
+            order.orderId = next(self.order_ids)
+        trade = Trade(contract, order, OrderStatus(orderId=order.orderId, status='PendingSubmit'))
+        self.trades[order.orderId] = trade
+        self.held.append(trade)
+        if order.transmit:
+            loop = asyncio.get_event_loop()
+            for held in self.held:
+                loop.call_later(self.ack_latency, self._ack, held)
+            self.held = []
+        return trade
+
+    def cancelOrder(self, order):
+        trade = self.trades.get(order.orderId)
+        if trade is not None:
+            asyncio.get_event_loop().call_later(self.ack_latency, self._set_status, trade, 'Cancelled')
+        return trade
+
+    def _ack(self, trade):
+        if trade.orderStatus.status == 'PendingSubmit':
+            status = 'PreSubmitted' if trade.order.orderType in ('STP', 'TRAIL') else 'Submitted'
+            self._set_status(trade, status)
+            self._match_orders()
+
+    def _set_status(self, trade, status):
+        if trade.orderStatus.status in ('Filled', 'Cancelled'):
+            return
+        trade.orderStatus.status = status
+        if status in ('Filled', 'Cancelled'):
+            self.trades.pop(trade.order.orderId, None)
+        trade.log.append(TradeLogEntry(datetime.now(timezone.utc), status))
+        trade.statusEvent.emit(trade)
+        self.orderStatusEvent.emit(trade)
+        if status == 'Cancelled':
+            # Attached orders go with their parent
+            for child in list(self.trades.values()):
+                if child.order.parentId == trade.order.orderId:
+                    self._set_status(child, 'Cancelled')
+
+    def _should_fill(self, trade):
+        order, price = trade.order, self.price(trade.contract)
+        if order.parentId in self.trades:
+            return False  # Attached orders wait for the parent to fill
+        if order.orderType == 'MKT':
+            return True
+        if order.orderType == 'LMT':
+            return price <= order.lmtPrice if order.action == 'BUY' else price >= order.lmtPrice
+        if order.orderType == 'STP':
+            return price <= order.auxPrice if order.action == 'SELL' else price >= order.auxPrice
+        if order.orderType in ('TRAIL', 'TRAIL LIMIT') and order.action == 'SELL':
+            # Ratchet the stop up behind the price, as the broker does
+            trailed = round(price * (1 - order.trailingPercent / 100), 2)
+            if order.trailStopPrice == UNSET_DOUBLE or trailed > order.trailStopPrice:
+                order.trailStopPrice = trailed
+            return price <= order.trailStopPrice
+        return False
+
+    def _match_orders(self):
+        loop = asyncio.get_event_loop()
+        for trade in list(self.trades.values()):
+            status = trade.orderStatus.status
+            if (status in ('Submitted', 'PreSubmitted') and trade.order.orderId not in self.filling
+                    and self._should_fill(trade)):
+                self.filling.add(trade.order.orderId)
+                loop.call_later(self.fill_latency, self._fill, trade)
+
+    def _fill(self, trade):
+        order = trade.order
+        self.filling.discard(order.orderId)
+        if order.orderId not in self.trades:
+            return  # Cancelled while the fill was in flight
+        price = order.lmtPrice if order.orderType == 'LMT' else self.price(trade.contract)
+        execution = Execution(
+            execId=f"{order.orderId}.1", time=datetime.now(timezone.utc),
+            side='BOT' if order.action == 'BUY' else 'SLD', shares=order.totalQuantity,
+            price=price, orderId=order.orderId, cumQty=order.totalQuantity, avgPrice=price
+        )
+        fill = Fill(trade.contract, execution, CommissionReport(), execution.time)
+        trade.fills.append(fill)
+        trade.orderStatus.filled = order.totalQuantity
+        trade.orderStatus.remaining = 0
+        trade.orderStatus.avgFillPrice = price
+        held = self.positions.get(trade.contract.conId)
+        quantity = held.position if held else 0
+        quantity += order.totalQuantity if order.action == 'BUY' else -order.totalQuantity
+        self.positions[trade.contract.conId] = Position('FAKE', trade.contract, quantity, price * 100)
+        trade.fillEvent.emit(trade, fill)
+        self.execDetailsEvent.emit(trade, fill)
+        self._set_status(trade, 'Filled')
+        if order.ocaGroup:
+            for other in list(self.trades.values()):
+                if other.order.ocaGroup == order.ocaGroup:
+                    self._set_status(other, 'Cancelled')
+        self._match_orders()
@@ -0,0 +1,73 @@
+from collections import OrderedDict
+import logging
+import threading
+import time
+from latency import recorder
+
+logger = logging.getLogger(__name__)
+
+
+class RecentKeys:
+    """Keys seen within the last ``window`` seconds, capped at ``max_size``, oldest forgotten first.
+
+    Thread-safe, so the stream thread, the poller thread and the event loop
+    can share one instance.
+    """
+
+    def __init__(self, window=600, max_size=10000):
+        self.window = window
+        self.max_size = max_size
+        self.keys = OrderedDict()  # key -> (monotonic time first seen, value)
+        self.lock = threading.Lock()
+
+    def add(self, key, value=None, now=None):
+        """Record a key; returns None if it is new, else the (time, value) it was first seen with"""
+        now = now or time.monotonic()
+        with self.lock:
+            keys = self.keys
+            while keys:
+                oldest = next(iter(keys.values()))
+                if now - oldest[0] <= self.window and len(keys) < self.max_size:
+                    break
+                keys.popitem(last=False)
+            first = keys.get(key)
+            if first is None:
+                keys[key] = (now, value)
+            return first
+
+    def __len__(self):
+        return len(self.keys)
+
+
+class TweetFanIn:
+    """Fan-in of several tweet sources (e.g. the stream and the poller) into one pipeline.
+
+    Every source calls ``on_tweet`` from its own thread. The first delivery
+    of a tweet ID goes to the pipeline; later copies are dropped, and the gap
+    between the two is recorded as the ``lead_<winning source>`` latency
+    stage, with ``wins`` counting how often each source was first.
+    """
+
+    def __init__(self, pipeline, window=600, max_size=10000):
+        self.pipeline = pipeline
+        self.seen = RecentKeys(window, max_size)
+        self.wins = {}  # source -> tweets it delivered first
+        self.duplicates = 0
+
+    def on_tweet(self, source, tweet_id, text, received_at=None, author=None):
+        """Hand a tweet from one source to the pipeline unless another source already did"""
+        received_at = received_at or time.monotonic()
+        if author is not None:
+            author = str(author)  # The stream gives an int, the poller a string
+        first = self.seen.add(str(tweet_id), source, received_at)
+        if first is None:
+            self.wins[source] = self.wins.get(source, 0) + 1
+            return self.pipeline.submit(text, received_at, author)
+
+        first_at, winner = first
+        self.duplicates += 1
+        if winner != source:
+            recorder.record(f'lead_{winner}', received_at - first_at)
+            logger.debug("Tweet %s arrived via %s %.0fms before %s",
+                         tweet_id, winner, (received_at - first_at) * 1000, source)
+        return False
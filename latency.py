@@ -0,0 +1,143 @@
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+import json
+import logging
+import threading
+import time
+
+logger = logging.getLogger(__name__)
+
+SUB_BUCKETS = 16  # Buckets per power of two, ~6% worst-case relative error
+MAX_SHIFT = 32  # Covers up to ~19 hours in microseconds
+
+
+def _bucket(value):
+    """Bucket index of a non-negative integer value (log-linear, HDR style)"""
+    if value < SUB_BUCKETS:
+        return value
+    shift = min(value.bit_length() - 5, MAX_SHIFT)
+    return SUB_BUCKETS + shift * SUB_BUCKETS + min(value >> shift, 2 * SUB_BUCKETS - 1) - SUB_BUCKETS
+
+
+def _bucket_value(index):
+    """Upper bound of the values that land in a bucket"""
+    if index < SUB_BUCKETS:
+        return index
+    shift, mantissa = divmod(index - SUB_BUCKETS, SUB_BUCKETS)
+    return ((mantissa + SUB_BUCKETS + 1) << shift) - 1
+
+
+class LatencyHistogram:
+    """Fixed-size log-linear histogram of latencies in microseconds.
+
+    Recording is an index computation and a list increment, so it is cheap
+    enough for the signal hot path; percentiles are computed only on read.
+    """
+
+    def __init__(self):
+        self.counts = [0] * (SUB_BUCKETS + (MAX_SHIFT + 1) * SUB_BUCKETS)
+        self.total = 0
+        self.max = 0
+
+    def record(self, seconds):
+        micros = int(seconds * 1_000_000) if seconds > 0 else 0
+        self.counts[_bucket(micros)] += 1
+        self.total += 1
+        if micros > self.max:
+            self.max = micros
+
+    def percentile(self, pct):
+        """Approximate latency in microseconds at the given percentile"""
+        if not self.total:
+            return 0
+        threshold = self.total * pct / 100
+        seen = 0
+        for index, count in enumerate(self.counts):
+            seen += count
+            if count and seen >= threshold:
+                return min(_bucket_value(index), self.max)
+        return self.max
+
+    def summary(self):
+        return {
+            'count': self.total,
+            'p50_ms': self.percentile(50) / 1000,
+            'p99_ms': self.percentile(99) / 1000,
+            'max_ms': self.max / 1000,
+        }
+
+
+class LatencyRecorder:
+    """Per-stage latency histograms from tweet receipt to order fill.
+
+    Stages are timed with ``time.monotonic`` and recorded with ``record``
+    or the ``since`` helper. The aggregated p50/p99/max per stage can be
+    read over HTTP (``serve``) or dumped to a JSON file periodically
+    (``start_dump``), together with any registered gauges.
+    """
+
+    def __init__(self):
+        self.histograms = {}  # stage name -> LatencyHistogram
+        self.gauges = {}  # name -> callable returning the current value
+        self.started = time.time()
+
+    def record(self, stage, seconds):
+        histogram = self.histograms.get(stage)
+        if histogram is None:
+            histogram = self.histograms[stage] = LatencyHistogram()
+        histogram.record(seconds)
+
+    def since(self, stage, start):
+        """Record the time elapsed since a time.monotonic() timestamp"""
+        self.record(stage, time.monotonic() - start)
+
+    def gauge(self, name, read):
+        """Report read() under name in every snapshot, e.g. a queue depth"""
+        self.gauges[name] = read
+
+    def snapshot(self):
+        return {
+            'uptime_s': round(time.time() - self.started, 1),
+            'stages': {stage: h.summary() for stage, h in list(self.histograms.items())},
+            'gauges': {name: read() for name, read in list(self.gauges.items())},
+        }
+
+    def dump(self, path):
+        with open(path, 'w') as f:
+            json.dump(self.snapshot(), f, indent=2)
+
+    def start_dump(self, path, interval=60):
+        """Rewrite the JSON snapshot at path every interval seconds on a daemon thread"""
+        def run():
+            while True:
+                time.sleep(interval)
+                try:
+                    self.dump(path)
+                except OSError as e:
+                    logger.error("Failed to write latency metrics: %s", e)
+
+        threading.Thread(target=run, name="latency-dump", daemon=True).start()
+
+    def serve(self, port, host='127.0.0.1'):
+        """Serve the JSON snapshot at http://host:port/ on a daemon thread"""
+        recorder = self
+
+        class Handler(BaseHTTPRequestHandler):
+            def do_GET(self):
+                body = json.dumps(recorder.snapshot(), indent=2).encode()
+                self.send_response(200)
+                self.send_header('Content-Type', 'application/json')
+                self.send_header('Content-Length', str(len(body)))
+                self.end_headers()
+                self.wfile.write(body)
+
+            def log_message(self, format, *args):
+                pass
+
+        server = ThreadingHTTPServer((host, port), Handler)
+        threading.Thread(target=server.serve_forever, name="latency-http", daemon=True).start()
+        logger.info("Serving latency metrics on http://%s:%s/", host, port)
+        return server
+
+
+# Shared recorder used by the pipeline, trader and order manager
+recorder = LatencyRecorder()
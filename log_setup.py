@@ -0,0 +1,93 @@
+from logging.handlers import QueueHandler, QueueListener
+import itertools
+import json
+import logging
+import queue
+
+FORMAT = '%(asctime)s - %(levelname)s - %(message)s'
+
+# Tweets without a signal; sampled so a busy feed cannot flood the log
+tweet_logger = logging.getLogger('tweets')
+
+# Signals and orders as JSON lines, kept out of the human-readable log
+trade_journal = logging.getLogger('trade_journal')
+trade_journal.propagate = False
+trade_journal.setLevel(logging.INFO)
+
+_listeners = []
+
+
+class DeferredQueueHandler(QueueHandler):
+    """QueueHandler that leaves all message formatting to the listener thread"""
+
+    def prepare(self, record):
+        return record
+
+
+class SampleFilter(logging.Filter):
+    """Lets one record in every ``rate`` through"""
+
+    def __init__(self, rate):
+        super().__init__()
+        self.rate = max(1, rate)
+        self.count = itertools.count()
+
+    def filter(self, record):
+        return next(self.count) % self.rate == 0
+
+
+class JsonLinesFormatter(logging.Formatter):
+    """One compact JSON object per record: timestamp, event name and the record's fields"""
+
+    def format(self, record):
+        return json.dumps({'ts': record.created, 'event': record.msg, **record.fields},
+                          default=str, separators=(',', ':'))
+
+
+def record_event(event, **fields):
+    """Append an event to the trade journal; serialized and written on the writer thread"""
+    trade_journal.info(event, extra={'fields': fields})
+
+
+def setup_logging(level=logging.INFO, path='trading.log', journal_path='trades.jsonl', tweet_sample_rate=100):
+    """Route all logging through queues to background writer threads.
+
+    Callers only enqueue the record; formatting and console/file I/O happen
+    on a QueueListener thread. Tweets logged through ``tweet_logger`` are
+    sampled to one in ``tweet_sample_rate``, and ``record_event`` writes to
+    the JSONL trade journal at ``journal_path`` through its own queue.
+    """
+    stop_logging()
+    formatter = logging.Formatter(FORMAT)
+    handlers = [logging.StreamHandler()]
+    if path:
+        handlers.append(logging.FileHandler(path))
+    for handler in handlers:
+        handler.setFormatter(formatter)
+
+    records = queue.SimpleQueue()
+    root = logging.getLogger()
+    root.setLevel(level)
+    root.handlers[:] = [DeferredQueueHandler(records)]
+    _listeners.append(QueueListener(records, *handlers, respect_handler_level=True))
+
+    tweet_logger.filters[:] = [SampleFilter(tweet_sample_rate)]
+
+    if journal_path:
+        handler = logging.FileHandler(journal_path)
+        handler.setFormatter(JsonLinesFormatter())
+        events = queue.SimpleQueue()
+        trade_journal.handlers[:] = [DeferredQueueHandler(events)]
+        _listeners.append(QueueListener(events, handler))
+
+    for listener in _listeners:
+        listener.start()
+
+
+def stop_logging():
+    """Flush the queued records and stop the writer threads"""
+    while _listeners:
+        listener = _listeners.pop()
+        listener.stop()
+        for handler in listener.handlers:
+            handler.close()
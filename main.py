@@ -1,63 +1,112 @@
 import tweepy
 import config
+from ib_insync import util
 from tweet_parser import TweetParser
 from trader import Trader
-import time
+from shards import ShardedTrader
+from pipeline import SignalPipeline
+from ingest import RecentKeys, TweetFanIn
+from tweet_poller import TweetPoller
+from stream_rules import StreamRuleManager, load_watchlist
+from latency import recorder
+from log_setup import setup_logging, stop_logging
 import logging
+import time
 
-# Set up logging
-logging.basicConfig(
-    level=logging.INFO,
-    format='%(asctime)s - %(levelname)s - %(message)s'
-)
 logger = logging.getLogger(__name__)
 
 class TwitterStreamListener(tweepy.StreamingClient):
-    def __init__(self, bearer_token, tweet_parser, trader):
+    def __init__(self, bearer_token, ingest):
         super().__init__(bearer_token)
-        self.tweet_parser = tweet_parser
-        self.trader = trader
+        self.ingest = ingest
     
     def on_tweet(self, tweet):
         try:
-            logger.info(f"Received tweet: {tweet.text}")
-            
-            # Parse the tweet for option signals
-            signal = self.tweet_parser.parse_option_signal(tweet.text)
+            received_at = time.monotonic()
             
-            if signal and self.tweet_parser.is_valid_signal(signal):
-                logger.info(f"Valid signal detected: {signal}")
-                
-                # Execute the trade
-                if self.trader.execute_option_trade(signal):
-                    logger.info("Trade executed successfully")
-                else:
-                    logger.error("Failed to execute trade")
-            else:
-                logger.debug("No valid signal found in tweet")
+            # Hand the tweet to the signal pipeline unless the poller beat us to it;
+            # parsing and trading happen on the event loop so the stream is never blocked
+            self.ingest.on_tweet('stream', tweet.id, tweet.text, received_at, tweet.author_id)
                 
         except Exception as e:
-            logger.error(f"Error processing tweet: {e}")
+            logger.error("Error processing tweet: %s", e)
 
 def main():
+    setup_logging(config.LOG_LEVEL, config.LOG_PATH, config.TRADE_JOURNAL_PATH, config.TWEET_LOG_SAMPLE_RATE)
+    
     # Initialize components
     tweet_parser = TweetParser()
-    trader = Trader()
+    if config.SHARD_COUNT > 1:
+        # Parse here, execute in one worker process per shard
+        trader = ShardedTrader(config.SHARD_COUNT, config.IB_CLIENT_ID, config.PIPELINE_QUEUE_SIZE)
+    else:
+        trader = Trader()
+    trader.initialize_client()
+    
+    pipeline = SignalPipeline(
+        tweet_parser,
+        trader,
+        queue_size=config.PIPELINE_QUEUE_SIZE,
+        max_in_flight=config.PIPELINE_MAX_IN_FLIGHT,
+        submit_timeout=config.PIPELINE_SUBMIT_TIMEOUT,
+        recent_signals=RecentKeys(config.INGEST_DEDUPE_WINDOW, config.INGEST_DEDUPE_MAX_SIZE)
+    )
+    pipeline.start(util.getLoop())
+    
+    # Both tweet sources race into the pipeline; the first copy of each tweet wins
+    ingest = TweetFanIn(pipeline, config.INGEST_DEDUPE_WINDOW, config.INGEST_DEDUPE_MAX_SIZE)
+    
+    # Expose per-stage latency metrics
+    if config.METRICS_PORT:
+        recorder.serve(config.METRICS_PORT)
+    if config.METRICS_DUMP_PATH:
+        recorder.start_dump(config.METRICS_DUMP_PATH, config.METRICS_DUMP_INTERVAL)
     
     # Initialize Twitter stream
     stream = TwitterStreamListener(
         bearer_token=config.TWITTER_BEARER_TOKEN,
-        tweet_parser=tweet_parser,
-        trader=trader
+        ingest=ingest
     )
     
-    # Add rules to filter tweets
-    for user_id in config.TARGET_USER_IDS:
-        stream.add_rules(tweepy.StreamRule(f"from:{user_id}"))
+    # Sync the stream's rules with the watchlist in at most a few batched calls
+    rules = StreamRuleManager(stream, config.STREAM_RULE_MAX_LENGTH, config.STREAM_MAX_RULES)
+    user_ids = list(config.TARGET_USER_IDS)
+    if config.WATCHLIST_PATH:
+        user_ids += load_watchlist(config.WATCHLIST_PATH)
+    rules.sync(user_ids)
+    if config.WATCHLIST_PATH:
+        rules.watch(config.WATCHLIST_PATH, config.TARGET_USER_IDS, config.WATCHLIST_RELOAD_INTERVAL)
+    
+    # Poll twitterapi.io into the same pipeline
+    poller = None
+    if config.TWITTERAPI_IO_KEY and config.TWITTERAPI_IO_USERS:
+        poller = TweetPoller(
+            config.TWITTERAPI_IO_KEY,
+            config.TWITTERAPI_IO_USERS,
+            on_tweet=lambda tweet: ingest.on_tweet('poller', tweet.get('id'), tweet.get('text', ''),
+                                                   author=tweet.get('author', {}).get('id')),
+            interval=config.POLL_INTERVAL,
+            max_query_length=config.POLL_MAX_QUERY_LENGTH
+        )
+        poller.start()
     
-    # Start streaming
+    # Start streaming on a background thread and run the event loop here
     logger.info("Starting Twitter stream...")
-    stream.filter(tweet_fields=['text'])
+    stream.filter(tweet_fields=['text', 'author_id'], threaded=True)
+    try:
+        util.run()
+    except KeyboardInterrupt:
+        logger.info("Shutting down...")
+        logger.info("Tweets delivered first by source: %s, %s duplicates dropped",
+                    ingest.wins, ingest.duplicates)
+    finally:
+        rules.stop()
+        stream.disconnect()
+        if poller:
+            poller.stop()
+        pipeline.stop()
+        trader.cleanup()
+        stop_logging()
     
 if __name__ == "__main__":
-    main() 
\ No newline at end of file
+    main()
@@ -0,0 +1,154 @@
+from ib_insync.util import UNSET_DOUBLE
+import asyncio
+import logging
+import time
+from latency import recorder
+from log_setup import record_event
+from request_scheduler import ORDERS, RequestScheduler
+
+logger = logging.getLogger(__name__)
+
+# IB order statuses mapped onto our state machine
+ACKED_STATUSES = {'PreSubmitted', 'Submitted'}
+DONE_STATUSES = {'Filled', 'Cancelled', 'ApiCancelled', 'Inactive'}
+
+
+def _price(value):
+    """An order price, or None when IB's unset marker"""
+    return None if value == UNSET_DOUBLE else value
+
+
+class OrderState:
+    """Lifecycle of one order: PendingSubmit -> Submitted -> PartiallyFilled -> Filled/Cancelled"""
+    __slots__ = ('trade', 'state', 'submitted_at', 'acked_at', 'filled_at',
+                 'filled', 'avg_fill_price', 'acked', 'done')
+
+    def __init__(self, trade, loop):
+        self.trade = trade
+        self.state = 'PendingSubmit'
+        self.submitted_at = time.monotonic()
+        self.acked_at = None
+        self.filled_at = None
+        self.filled = 0.0
+        self.avg_fill_price = 0.0
+        self.acked = loop.create_future()  # Resolves when the broker acknowledges the order
+        self.done = loop.create_future()  # Resolves with the final state
+
+    @property
+    def order_id(self):
+        return self.trade.order.orderId
+
+    @property
+    def ack_latency(self):
+        """Seconds from submit to acknowledgement, or None"""
+        return self.acked_at - self.submitted_at if self.acked_at else None
+
+    @property
+    def fill_latency(self):
+        """Seconds from submit to complete fill, or None"""
+        return self.filled_at - self.submitted_at if self.filled_at else None
+
+    def __repr__(self):
+        return f"OrderState({self.order_id} {self.state} filled={self.filled})"
+
+
+class OrderManager:
+    """Tracks orders from ib_insync events instead of sleeping and polling.
+
+    Subscribes once to ``orderStatusEvent`` and ``execDetailsEvent`` and
+    drives an ``OrderState`` per order, whose ``acked``/``done`` futures let
+    callers react the moment the broker reports an ack or fill. Submit-to-ack
+    and submit-to-fill latencies are recorded as the order_ack/order_fill
+    latency stages.
+    """
+
+    def __init__(self, ib, scheduler=None):
+        self.ib = ib
+        self.scheduler = scheduler or RequestScheduler()
+        self.orders = {}  # orderId -> OrderState for live orders
+        ib.orderStatusEvent += self.on_order_status
+        ib.execDetailsEvent += self.on_exec_details
+
+    async def submit(self, contract, order):
+        """Place an order through the scheduler's order lane and return its OrderState"""
+        trade = await self.scheduler.call(ORDERS, self.ib.placeOrder, contract, order)
+        state = OrderState(trade, asyncio.get_event_loop())
+        self.orders[trade.order.orderId] = state
+        record_event('order', order_id=order.orderId, con_id=contract.conId,
+                     symbol=contract.localSymbol or contract.symbol, action=order.action,
+                     type=order.orderType, quantity=order.totalQuantity,
+                     limit=_price(order.lmtPrice), aux=_price(order.auxPrice),
+                     trail_stop=_price(order.trailStopPrice),
+                     parent_id=order.parentId, oca_group=order.ocaGroup)
+        # Status updates may have arrived before we got to register the order
+        self.on_order_status(trade)
+        return state
+
+    def cancel(self, order):
+        """Cancel an order through the scheduler's order lane"""
+        return self.scheduler.call(ORDERS, self.ib.cancelOrder, order)
+
+    def on_order_status(self, trade):
+        state = self.orders.get(trade.order.orderId)
+        if state is None:
+            return
+        status = trade.orderStatus.status
+        now = time.monotonic()
+
+        if (status in ACKED_STATUSES or status in DONE_STATUSES) and state.acked_at is None:
+            state.acked_at = now
+            recorder.record('order_ack', state.ack_latency)
+            if not state.acked.done():
+                state.acked.set_result(status)
+
+        state.filled = trade.orderStatus.filled
+        state.avg_fill_price = trade.orderStatus.avgFillPrice
+        if status == 'Filled':
+            state.state = 'Filled'
+        elif status in DONE_STATUSES:
+            state.state = 'Cancelled'
+        elif status in ACKED_STATUSES:
+            state.state = 'PartiallyFilled' if state.filled else 'Submitted'
+
+        if state.state == 'Filled' and state.filled_at is None:
+            state.filled_at = now
+            recorder.record('order_fill', state.fill_latency)
+            logger.info("Order %s filled %s @ %s (ack %.0fms, fill %.0fms)", state.order_id, state.filled,
+                        state.avg_fill_price, state.ack_latency * 1000, state.fill_latency * 1000)
+
+        if state.state in ('Filled', 'Cancelled'):
+            del self.orders[state.order_id]
+            record_event('order_done', order_id=state.order_id, state=state.state, status=status,
+                         filled=state.filled, avg_fill_price=state.avg_fill_price,
+                         ack_latency=state.ack_latency, fill_latency=state.fill_latency)
+            if not state.done.done():
+                state.done.set_result(state.state)
+
+    def on_exec_details(self, trade, fill):
+        # Executions can arrive before the matching status update
+        state = self.orders.get(trade.order.orderId)
+        if state is not None and state.state in ('Submitted', 'PendingSubmit'):
+            state.state = 'PartiallyFilled'
+
+    async def wait_acked(self, state, timeout):
+        """Wait for the broker to acknowledge an order; returns False on timeout"""
+        try:
+            await asyncio.wait_for(asyncio.shield(state.acked), timeout)
+            return state.state != 'Cancelled'
+        except asyncio.TimeoutError:
+            return False
+
+    async def wait_filled(self, state, timeout):
+        """Wait for a complete fill; cancels whatever is left after the timeout.
+
+        Returns the quantity filled, which may be partial.
+        """
+        try:
+            await asyncio.wait_for(asyncio.shield(state.done), timeout)
+        except asyncio.TimeoutError:
+            self.cancel(state.trade.order)
+            try:
+                await asyncio.wait_for(asyncio.shield(state.done), timeout)
+            except asyncio.TimeoutError:
+                logger.warning("No cancel confirmation for order %s", state.order_id)
+        return state.filled
@@ -0,0 +1,154 @@
+import asyncio
+import logging
+import time
+from latency import recorder
+from log_setup import record_event, tweet_logger
+
+logger = logging.getLogger(__name__)
+
+
+class SignalPipeline:
+    """Asynchronous ingest -> parse -> validate -> execute pipeline.
+
+    Stages are connected by bounded asyncio queues and run on the ib_insync
+    event loop. The execute stage starts one task per signal, so a trade that
+    is waiting for its entry price never holds up the tweets behind it. When
+    the number of trades in flight reaches ``max_in_flight`` the execute stage
+    stops pulling signals, the queues fill up and the stream thread is slowed
+    down by ``submit``. With ``recent_signals`` (an ingest.RecentKeys) a
+    signal whose normalized key was already seen inside its window is
+    dropped after parsing, so the same alert is never traded twice.
+    """
+
+    def __init__(self, tweet_parser, trader, queue_size=100, max_in_flight=20,
+                 submit_timeout=5, recent_signals=None):
+        self.tweet_parser = tweet_parser
+        self.trader = trader
+        self.recent_signals = recent_signals
+        self.queue_size = queue_size
+        self.max_in_flight = max_in_flight
+        self.submit_timeout = submit_timeout
+        self.loop = None
+        self.ingest_queue = None
+        self.validate_queue = None
+        self.execute_queue = None
+        self.in_flight = set()  # Tasks currently executing a trade
+        self._slots = None
+        self.stage_tasks = []
+        self.dropped = 0
+
+    def start(self, loop=None):
+        """Create the stage queues and schedule the stage workers on the loop"""
+        self.loop = loop or asyncio.get_event_loop()
+        self.ingest_queue = asyncio.Queue(self.queue_size)
+        self.validate_queue = asyncio.Queue(self.queue_size)
+        self.execute_queue = asyncio.Queue(self.queue_size)
+        self._slots = asyncio.Semaphore(self.max_in_flight)
+        self.stage_tasks = [
+            self.loop.create_task(self._parse_stage()),
+            self.loop.create_task(self._validate_stage()),
+            self.loop.create_task(self._execute_stage()),
+        ]
+        logger.info("Signal pipeline started")
+
+    def stop(self):
+        """Cancel the stage workers and every trade still in flight"""
+        for task in self.stage_tasks + list(self.in_flight):
+            task.cancel()
+        self.stage_tasks = []
+        logger.info("Signal pipeline stopped")
+
+    def submit(self, text, received_at=None, author=None):
+        """Hand a tweet to the pipeline from a foreign thread (e.g. the tweepy stream).
+
+        Blocks the calling thread while the ingest queue is full, which pushes
+        back on the stream. Returns False if the tweet had to be dropped.
+        """
+        return self._submit(self.ingest_queue, (text, received_at or time.monotonic(), author))
+
+    def submit_signal(self, signal):
+        """Hand an already parsed and validated signal straight to the execute stage from a foreign thread"""
+        return self._submit(self.execute_queue, signal)
+
+    def _submit(self, queue, item):
+        future = asyncio.run_coroutine_threadsafe(queue.put(item), self.loop)
+        try:
+            future.result(self.submit_timeout)
+            return True
+        except Exception:
+            future.cancel()
+            self.dropped += 1
+            logger.warning("Pipeline overloaded, dropped item (%s dropped so far)", self.dropped)
+            return False
+
+    async def put(self, text, received_at=None, author=None):
+        """Hand a tweet to the pipeline from a coroutine running on the loop"""
+        await self.ingest_queue.put((text, received_at or time.monotonic(), author))
+
+    async def _parse_stage(self):
+        while True:
+            text, received_at, author = await self.ingest_queue.get()
+            try:
+                started = time.monotonic()
+                recorder.record('ingest_queue', started - received_at)
+                signals = self.tweet_parser.parse_all(text)
+                recorder.since('parse', started)
+                for signal in signals:
+                    if self.recent_signals is not None and self.recent_signals.add(signal.key, now=received_at):
+                        logger.info("Duplicate signal ignored: %s", signal)
+                        continue
+                    signal.received_at = received_at
+                    signal.author = author
+                    await self.validate_queue.put(signal)
+                if signals:
+                    logger.info("Signal tweet: %s", text)
+                else:
+                    tweet_logger.info("No signal in tweet: %s", text)
+            except Exception as e:
+                logger.error("Error parsing tweet: %s", e)
+            finally:
+                self.ingest_queue.task_done()
+
+    async def _validate_stage(self):
+        while True:
+            signal = await self.validate_queue.get()
+            try:
+                started = time.monotonic()
+                valid = self.tweet_parser.is_valid_signal(signal)
+                recorder.since('validate', started)
+                if valid:
+                    logger.info("Valid signal detected: %s", signal)
+                    record_event('signal', symbol=signal.symbol, expiry=signal.expiry, strike=signal.strike,
+                                 right=signal.right, target_price=signal.target_price,
+                                 received_at=signal.received_at, author=signal.author)
+                    await self.execute_queue.put(signal)
+                else:
+                    logger.debug("Discarding invalid signal: %s", signal)
+            except Exception as e:
+                logger.error("Error validating signal: %s", e)
+            finally:
+                self.validate_queue.task_done()
+
+    async def _execute_stage(self):
+        while True:
+            signal = await self.execute_queue.get()
+            await self._slots.acquire()
+            task = self.loop.create_task(self._execute(signal))
+            self.in_flight.add(task)
+            task.add_done_callback(self.in_flight.discard)
+            self.execute_queue.task_done()
+
+    async def _execute(self, signal):
+        try:
+            result = await self.trader.execute_option_trade(signal)
+            if result is None:
+                # Handed to another process (shards.ShardedTrader), which reports the outcome
+                logger.debug("Signal dispatched: %s", signal)
+            elif result:
+                logger.info("Trade executed successfully")
+            else:
+                logger.error("Failed to execute trade")
+        except Exception as e:
+            logger.error("Error executing signal %s: %s", signal, e)
+        finally:
+            self._slots.release()
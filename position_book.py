@@ -0,0 +1,165 @@
+import numpy as np
+
+
+class Evaluation:
+    """Slots flagged by one PositionBook.evaluate pass"""
+    __slots__ = ('average_down', 'profit_targets', 'trailing_stops')
+
+    def __init__(self, average_down, profit_targets, trailing_stops):
+        self.average_down = average_down      # Slots that crossed the average-down threshold
+        self.profit_targets = profit_targets  # Slots that reached a new profit target tier
+        self.trailing_stops = trailing_stops  # Slots that fell through their trailing stop
+
+
+class PositionBook:
+    """Array-backed book of open option positions.
+
+    Each position occupies a slot in a set of parallel NumPy arrays (entry
+    price, quantity, last price, high-water mark and per-position
+    thresholds). ``update_prices`` writes ticks into the arrays and
+    ``evaluate`` checks average-down, profit-target and trailing-stop
+    conditions for every open position in one vectorized pass.
+    """
+
+    # Per-position arrays: name -> (dtype, value of an empty slot)
+    FIELDS = {
+        'active': (bool, False),
+        'con_id': (np.int64, 0),
+        'quantity': (np.int64, 0),
+        'entry_price': (np.float64, 0.0),
+        'last_price': (np.float64, np.nan),
+        'high_water': (np.float64, 0.0),
+        'average_down_threshold': (np.float64, 0.0),
+        'trailing_stop': (np.float64, 0.0),
+        'stop_price': (np.float64, 0.0),  # Price of the resting stop orders, 0 if unknown
+        'targets_hit': (np.int64, 0),  # Profit target tiers reached so far
+        'averaged_down': (bool, False),
+        'stop_triggered': (bool, False),
+        'busy': (bool, False),  # An order for this position is in flight
+        'entry_time': (np.float64, 0.0),
+    }
+
+    def __init__(self, profit_targets, average_down_threshold, trailing_stop_percentage,
+                 max_contracts, capacity=64):
+        self.profit_targets = np.sort(np.asarray(list(profit_targets), dtype=float))
+        self.default_average_down = average_down_threshold
+        self.default_trailing_stop = trailing_stop_percentage
+        self.max_contracts = max_contracts
+        self.slots = {}  # position key -> slot
+        self.by_con_id = {}  # conId -> slot
+        self.free = []  # Slots of closed positions, reused first
+        self.size = 0  # High-water mark of slots in use
+        self._allocate(capacity)
+
+    def _allocate(self, capacity):
+        """Create the arrays, or grow them to capacity keeping existing slots"""
+        for name, (dtype, fill) in self.FIELDS.items():
+            array = np.full(capacity, fill, dtype=dtype)
+            old = getattr(self, name, None)
+            if old is not None:
+                array[:len(old)] = old
+            setattr(self, name, array)
+        old_capacity = len(getattr(self, 'contracts', []))
+        self.contracts = getattr(self, 'contracts', []) + [None] * (capacity - old_capacity)
+        self.keys = getattr(self, 'keys', []) + [None] * (capacity - old_capacity)
+
+    def __contains__(self, key):
+        return key in self.slots
+
+    def __len__(self):
+        return len(self.slots)
+
+    def open(self, key, contract, quantity, entry_price, entry_time):
+        """Add a new position and return its slot; adds to it if the key is already open"""
+        if key in self.slots:
+            slot = self.slots[key]
+            self.add_fill(slot, quantity, entry_price)
+            return slot
+
+        if self.free:
+            slot = self.free.pop()
+        else:
+            if self.size == len(self.active):
+                self._allocate(len(self.active) * 2)
+            slot = self.size
+            self.size += 1
+
+        self.slots[key] = slot
+        self.by_con_id[contract.conId] = slot
+        self.keys[slot] = key
+        self.contracts[slot] = contract
+        self.active[slot] = True
+        self.con_id[slot] = contract.conId
+        self.quantity[slot] = quantity
+        self.entry_price[slot] = entry_price
+        self.last_price[slot] = entry_price
+        self.high_water[slot] = entry_price
+        self.average_down_threshold[slot] = self.default_average_down
+        self.trailing_stop[slot] = self.default_trailing_stop
+        self.targets_hit[slot] = 0
+        self.averaged_down[slot] = False
+        self.stop_triggered[slot] = False
+        self.busy[slot] = False
+        self.entry_time[slot] = entry_time
+        return slot
+
+    def close(self, key):
+        """Remove a position and free its slot"""
+        slot = self.slots.pop(key)
+        self.by_con_id.pop(int(self.con_id[slot]), None)
+        self.active[slot] = False
+        self.quantity[slot] = 0
+        self.contracts[slot] = None
+        self.keys[slot] = None
+        self.free.append(slot)
+        return slot
+
+    def add_fill(self, slot, quantity, price):
+        """Add contracts to a position, updating its average entry price"""
+        total = self.quantity[slot] + quantity
+        self.entry_price[slot] = (self.entry_price[slot] * self.quantity[slot] + price * quantity) / total
+        self.quantity[slot] = total
+
+    def reduce(self, slot, quantity):
+        """Remove sold contracts from a position; returns the quantity left"""
+        self.quantity[slot] = max(0, self.quantity[slot] - quantity)
+        return int(self.quantity[slot])
+
+    def update_prices(self, con_ids, prices):
+        """Write the latest prices for the given conIds into the book"""
+        for con_id, price in zip(con_ids, prices):
+            slot = self.by_con_id.get(con_id)
+            if slot is not None and price == price and price > 0:
+                self.last_price[slot] = price
+
+    def evaluate(self):
+        """Check every open position at once and return the slots needing action"""
+        n = self.size
+        active = self.active[:n]
+        last = self.last_price[:n]
+        entry = self.entry_price[:n]
+        high_water = self.high_water[:n]
+
+        priced = active & (last > 0)  # NaN compares False
+        np.maximum(high_water, np.where(priced, last, 0), out=high_water)
+        change = np.zeros(n)
+        np.divide(last - entry, entry, out=change, where=priced & (entry > 0))
+
+        stops = (priced & ~self.stop_triggered[:n]
+                 & (last <= high_water * (1 - self.trailing_stop[:n])))
+        self.stop_triggered[:n] |= stops
+
+        # A position falling through its stop in this pass is being sold, not added to
+        average_down = (priced & ~self.busy[:n] & ~stops
+                        & (self.quantity[:n] < self.max_contracts)
+                        & (change <= self.average_down_threshold[:n]))
+
+        tiers = np.searchsorted(self.profit_targets, change, side='right')
+        new_tiers = priced & (tiers > self.targets_hit[:n])
+        self.targets_hit[:n] = np.where(new_tiers, tiers, self.targets_hit[:n])
+
+        return Evaluation(
+            np.flatnonzero(average_down),
+            np.flatnonzero(new_tiers),
+            np.flatnonzero(stops)
+        )
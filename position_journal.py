@@ -0,0 +1,77 @@
+from ib_insync import Contract
+import dataclasses
+import json
+import sqlite3
+import time
+
+
+class PositionJournal:
+    """Append-only SQLite (WAL) journal of position changes.
+
+    Every entry, average-down, exit fill and close is appended as one row
+    and committed immediately, so a crash loses at most the event being
+    written. ``replay`` returns the events of positions that were never
+    closed, in the order they happened, which is all that is needed to
+    rebuild the book at startup however long the history is.
+    """
+
+    def __init__(self, path='positions.db'):
+        self.db = sqlite3.connect(path)
+        self.db.execute("PRAGMA journal_mode=WAL")
+        self.db.execute("PRAGMA synchronous=NORMAL")
+        self.db.execute(
+            "CREATE TABLE IF NOT EXISTS events ("
+            "id INTEGER PRIMARY KEY AUTOINCREMENT, ts REAL, event TEXT, key TEXT, "
+            "contract TEXT, quantity INTEGER, price REAL)"
+        )
+        self.db.execute("CREATE INDEX IF NOT EXISTS events_key ON events (key, event)")
+        self.db.commit()
+
+    def record(self, event, key, contract=None, quantity=0, price=0.0):
+        """Append one event; the contract is only needed for 'entry'"""
+        details = json.dumps(dataclasses.asdict(contract)) if contract is not None else None
+        self.db.execute(
+            "INSERT INTO events (ts, event, key, contract, quantity, price) VALUES (?, ?, ?, ?, ?, ?)",
+            (time.time(), event, key, details, quantity, price)
+        )
+        self.db.commit()
+
+    def replay(self):
+        """Yield (event, key, contract, quantity, price, ts) for every still-open position"""
+        # Only events after a key's last close belong to a position that is still open
+        rows = self.db.execute(
+            "SELECT event, key, contract, quantity, price, ts FROM events e "
+            "WHERE e.id > COALESCE((SELECT MAX(id) FROM events c "
+            "WHERE c.key = e.key AND c.event = 'close'), 0) ORDER BY e.id"
+        )
+        for event, key, details, quantity, price, ts in rows:
+            contract = Contract.create(**json.loads(details)) if details else None
+            yield event, key, contract, quantity, price, ts
+
+    def exits_since(self, since):
+        """Yield (quantity, average entry price, exit price) for every exit at or after ``since``, closed keys included"""
+        # The entry price is the position's average cost at the time of the exit,
+        # so every earlier event of the keys involved is walked as well
+        rows = self.db.execute(
+            "SELECT event, key, quantity, price, ts FROM events "
+            "WHERE key IN (SELECT key FROM events WHERE event = 'exit' AND ts >= ?) ORDER BY id",
+            (since,)
+        )
+        held = {}  # key -> [quantity, average entry price]
+        for event, key, quantity, price, ts in rows:
+            position = held.setdefault(key, [0, 0.0])
+            if event in ('entry', 'average_down'):
+                total = position[0] + quantity
+                position[1] = (position[1] * position[0] + price * quantity) / total if total else price
+                position[0] = total
+            elif event == 'exit':
+                if ts >= since:
+                    yield quantity, position[1], price
+                position[0] = max(0, position[0] - quantity)
+            elif event == 'reconcile':
+                position[0] = quantity
+            elif event == 'close':
+                del held[key]
+
+    def close(self):
+        self.db.close()
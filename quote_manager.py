@@ -0,0 +1,165 @@
+from collections import OrderedDict
+import asyncio
+import logging
+import math
+from request_scheduler import ENTRY, MONITOR, RequestScheduler
+
+logger = logging.getLogger(__name__)
+
+
+def _valid(value):
+    """Return value if it is a usable price, None for missing/NaN/negative ticks"""
+    if value is None or math.isnan(value) or value <= 0:
+        return None
+    return value
+
+
+class QuoteManager:
+    """Keeps one streaming market data subscription per contract.
+
+    Tickers are created once with ``reqMktData`` and updated in place by
+    ib_insync, so reading the latest bid/ask/last is a dictionary lookup.
+    Subscriptions are kept in LRU order and the least recently used one is
+    cancelled when ``max_lines`` would be exceeded, so we stay under IB's
+    market data line limit. Contracts with an open position are pinned and
+    never evicted; ``release`` cancels the subscription once a position is flat.
+    Requests are paced by the RequestScheduler, so a new subscription has no
+    ticker until its request has been sent; ``get_price`` waits for both.
+    """
+
+    def __init__(self, ib, max_lines=90, wait_timeout=2, scheduler=None):
+        self.ib = ib
+        self.scheduler = scheduler or RequestScheduler()
+        self.max_lines = max_lines
+        self.wait_timeout = wait_timeout  # Max seconds to wait for the first tick
+        self.tickers = OrderedDict()  # conId -> Ticker, least recently used first
+        self.requested = {}  # conId -> future of a reqMktData still queued in the scheduler
+        self.pinned = set()  # conIds with open positions
+
+    def subscribe(self, contract, lane=MONITOR):
+        """Return the live ticker for a qualified contract, or None while its subscription is queued"""
+        con_id = contract.conId
+        ticker = self.tickers.get(con_id)
+        if ticker is not None:
+            self.tickers.move_to_end(con_id)
+            return ticker
+        if con_id in self.requested:
+            return None
+
+        self._make_room()
+        request = self.scheduler.call(lane, self.ib.reqMktData, contract)
+        self.requested[con_id] = request
+        request.add_done_callback(lambda _: self._subscribed(con_id, request))
+        return None
+
+    def _subscribed(self, con_id, request):
+        if self.requested.get(con_id) is not request:
+            return
+        del self.requested[con_id]
+        if not request.cancelled() and request.exception() is None:
+            self.tickers[con_id] = request.result()
+            logger.debug("Subscribed to market data for %s", con_id)
+
+    def _make_room(self):
+        """Evict least recently used, unpinned subscriptions until a line is free"""
+        if len(self.tickers) + len(self.requested) < self.max_lines:
+            return
+        for con_id in list(self.tickers):
+            if len(self.tickers) + len(self.requested) < self.max_lines:
+                break
+            if con_id not in self.pinned:
+                self._cancel(con_id)
+        if len(self.tickers) + len(self.requested) >= self.max_lines:
+            logger.warning("All %s market data lines are pinned by open positions", len(self.tickers))
+
+    def _cancel(self, con_id):
+        request = self.requested.pop(con_id, None)
+        if request is not None:
+            request.cancel()
+        ticker = self.tickers.pop(con_id, None)
+        if ticker is not None:
+            # Same lane as entry subscriptions, so a re-subscribe can never overtake the cancel
+            self.scheduler.call(ENTRY, self.ib.cancelMktData, ticker.contract)
+            logger.debug("Cancelled market data for %s", ticker.contract.localSymbol or con_id)
+
+    def pin(self, contract, lane=MONITOR):
+        """Keep the subscription for a contract alive while a position is open"""
+        self.pinned.add(contract.conId)
+        self.subscribe(contract, lane)
+
+    def release(self, contract):
+        """Cancel the subscription for a contract whose position is now flat"""
+        self.pinned.discard(contract.conId)
+        self._cancel(contract.conId)
+
+    def quote(self, contract):
+        """Return the latest (bid, ask, last) without waiting; missing values are None"""
+        ticker = self.subscribe(contract)
+        if ticker is None:
+            return None, None, None
+        return _valid(ticker.bid), _valid(ticker.ask), _valid(ticker.last)
+
+    @staticmethod
+    def ticker_price(ticker):
+        """Return a ticker's last trade price, falling back to the bid/ask midpoint"""
+        last = _valid(ticker.last)
+        if last:
+            return last
+        bid, ask = _valid(ticker.bid), _valid(ticker.ask)
+        if bid and ask:
+            return (bid + ask) / 2
+        return None
+
+    def price(self, contract, lane=MONITOR):
+        """Return the latest price of a contract without waiting"""
+        ticker = self.subscribe(contract, lane)
+        return self.ticker_price(ticker) if ticker is not None else None
+
+    async def get_price(self, contract, lane=ENTRY):
+        """Return the latest price, waiting briefly for a new subscription and its first tick"""
+        price = self.price(contract, lane)
+        if price is not None:
+            return price
+
+        loop = asyncio.get_event_loop()
+        deadline = loop.time() + self.wait_timeout
+        try:
+            ticker = self.tickers.get(contract.conId)
+            if ticker is None:
+                request = self.requested.get(contract.conId)
+                if request is None:
+                    return None
+                try:
+                    ticker = await asyncio.wait_for(asyncio.shield(request), self.wait_timeout)
+                except asyncio.CancelledError:
+                    if not request.cancelled():
+                        raise
+                    return None  # Evicted before it was sent
+                price = self.ticker_price(ticker)
+                if price is not None:
+                    return price
+
+            first_tick = loop.create_future()
+
+            def on_update(updated):
+                if not first_tick.done() and self.ticker_price(ticker) is not None:
+                    first_tick.set_result(None)
+
+            ticker.updateEvent += on_update
+            try:
+                await asyncio.wait_for(first_tick, max(0, deadline - loop.time()))
+            finally:
+                ticker.updateEvent -= on_update
+        except asyncio.TimeoutError:
+            logger.debug("No market data yet for %s", contract.localSymbol or contract.conId)
+        return self.price(contract, lane)
+
+    def cancel_all(self):
+        """Cancel every subscription directly; used at shutdown, when queued requests would never run"""
+        for request in self.requested.values():
+            request.cancel()
+        self.requested.clear()
+        for ticker in self.tickers.values():
+            self.ib.cancelMktData(ticker.contract)
+        self.tickers.clear()
+        self.pinned.clear()
@@ -0,0 +1,113 @@
+from collections import deque
+import asyncio
+import inspect
+import logging
+import time
+from latency import recorder
+
+logger = logging.getLogger(__name__)
+
+# Priority lanes, highest first
+ORDERS = 0  # Order placement, modification and cancels
+ENTRY = 1  # Contract lookups and quotes a pending entry is waiting on
+MONITOR = 2  # Everything else: position quotes, housekeeping
+LANE_NAMES = ('orders', 'entry', 'monitor')
+
+
+class RequestScheduler:
+    """Single gate for every request sent to IB.
+
+    A token bucket refilled at ``rate`` messages per second (burst up to
+    ``burst``) keeps us under IB's pacing limit. Queued requests leave in
+    strict lane order, and the lower lanes may not take the last
+    ``reserve`` tokens, so an order arriving while the bucket is busy with
+    quotes waits at most one refill interval. Requests given the same
+    ``key`` while one is in flight share its result instead of being sent
+    twice. Time spent queued is recorded per lane as the ``sched_<lane>``
+    latency stage and ``depths`` reports the current queue lengths.
+    """
+
+    def __init__(self, rate=45, burst=10, reserve=2):
+        self.rate = rate
+        self.burst = burst
+        self.reserve = reserve
+        self.tokens = float(burst)
+        self.updated = time.monotonic()
+        self.lanes = [deque() for _ in LANE_NAMES]
+        self.in_flight = {}  # key -> future of the request being sent or awaited
+        self.sent = 0
+        self.coalesced = 0
+        self._timer = None
+
+    def call(self, lane, fn, *args, key=None):
+        """Queue fn(*args) in a lane; returns a future with its result (awaited if it is a coroutine)"""
+        if key is not None:
+            future = self.in_flight.get(key)
+            if future is not None:
+                self.coalesced += 1
+                return future
+        future = asyncio.get_event_loop().create_future()
+        if key is not None:
+            self.in_flight[key] = future
+            future.add_done_callback(lambda _: self.in_flight.pop(key, None))
+        self.lanes[lane].append((fn, args, future, time.monotonic()))
+        self._drain()
+        return future
+
+    def depths(self):
+        """Queued requests per lane"""
+        return {name: len(queue) for name, queue in zip(LANE_NAMES, self.lanes)}
+
+    def _refill(self, now):
+        self.tokens = min(self.burst, self.tokens + (now - self.updated) * self.rate)
+        self.updated = now
+
+    def _on_timer(self):
+        self._timer = None
+        self._drain()
+
+    def _drain(self):
+        now = time.monotonic()
+        self._refill(now)
+        for lane, queue in enumerate(self.lanes):
+            floor = 1 if lane == ORDERS else 1 + self.reserve
+            while queue and self.tokens >= floor:
+                fn, args, future, queued_at = queue.popleft()
+                self.tokens -= 1
+                self.sent += 1
+                recorder.record(f'sched_{LANE_NAMES[lane]}', now - queued_at)
+                self._run(fn, args, future)
+            if queue:
+                # Lower lanes wait until this one is empty; wake up when it can send again
+                loop = asyncio.get_event_loop()
+                when = loop.time() + (floor - self.tokens) / self.rate
+                if self._timer is None or when < self._timer.when():
+                    if self._timer is not None:
+                        self._timer.cancel()
+                    self._timer = loop.call_at(when, self._on_timer)
+                return
+
+    @staticmethod
+    def _run(fn, args, future):
+        if future.cancelled():
+            return
+        try:
+            result = fn(*args)
+        except Exception as e:
+            future.set_exception(e)
+            return
+        if not inspect.isawaitable(result):
+            future.set_result(result)
+            return
+
+        def done(task):
+            if future.cancelled():
+                return
+            if task.cancelled():
+                future.cancel()
+            elif task.exception() is not None:
+                future.set_exception(task.exception())
+            else:
+                future.set_result(task.result())
+
+        asyncio.ensure_future(result).add_done_callback(done)
@@ -0,0 +1,149 @@
+from datetime import datetime, timedelta
+import logging
+import time
+
+logger = logging.getLogger(__name__)
+
+
+class RiskEngine:
+    """Exposure limits checked in constant time on the entry path.
+
+    Open contracts and premium at risk (cost basis) are kept per underlying,
+    per expiry and for the whole account, updated on every fill and exit
+    instead of being summed over the position book. Realized P&L and signal
+    counts per source account are kept for the current day and reset at
+    local midnight. A limit of 0 disables that check. An order that passed
+    its check is ``reserve``d until it is done, so entries placed while it
+    is in flight are checked against it too.
+
+    Each execution shard runs its own engine. An underlying belongs to one
+    shard, so per-underlying limits apply as configured, while ``split``
+    gives every shard its share of the account-wide and per-expiry limits.
+    """
+
+    def __init__(self, max_contracts_per_underlying=0, max_premium_per_underlying=0,
+                 max_contracts_per_expiry=0, max_premium_per_expiry=0,
+                 max_contracts=0, max_premium=0, max_daily_loss=0, max_signals_per_source=0,
+                 multiplier=100):
+        self.max_contracts_per_underlying = max_contracts_per_underlying
+        self.max_premium_per_underlying = max_premium_per_underlying
+        self.max_contracts_per_expiry = max_contracts_per_expiry
+        self.max_premium_per_expiry = max_premium_per_expiry
+        self.max_contracts = max_contracts
+        self.max_premium = max_premium
+        self.max_daily_loss = max_daily_loss
+        self.max_signals_per_source = max_signals_per_source
+        self.multiplier = multiplier
+        self.underlyings = {}  # symbol -> [open contracts, premium at risk]
+        self.expiries = {}  # expiry -> [open contracts, premium at risk]
+        self.contracts = 0  # Open contracts across the account
+        self.premium = 0.0  # Premium at risk across the account
+        self.realized_pnl = 0.0  # Today's realized P&L
+        self.signals = {}  # source account -> signals received today
+        self.rejected = 0
+        self._new_day()
+
+    def split(self, count):
+        """Keep 1/count of every limit that is shared across shards"""
+        for name in ('max_contracts', 'max_contracts_per_expiry'):
+            limit = getattr(self, name)
+            if limit:
+                setattr(self, name, max(1, limit // count))
+        for name in ('max_premium', 'max_premium_per_expiry', 'max_daily_loss'):
+            setattr(self, name, getattr(self, name) / count)
+
+    def _new_day(self):
+        today = datetime.now().date()
+        self.day_start = datetime.combine(today, datetime.min.time()).timestamp()
+        self.day_end = datetime.combine(today + timedelta(days=1), datetime.min.time()).timestamp()
+        self.realized_pnl = 0.0
+        self.signals = {}
+
+    def _roll(self):
+        if time.time() >= self.day_end:
+            self._new_day()
+
+    def _apply(self, symbol, expiry, quantity, premium):
+        for totals, key in ((self.underlyings, symbol.upper()), (self.expiries, expiry)):
+            entry = totals.get(key)
+            if entry is None:
+                entry = totals[key] = [0, 0.0]
+            entry[0] += quantity
+            entry[1] += premium
+            if entry[0] <= 0:
+                del totals[key]
+        self.contracts += quantity
+        self.premium += premium
+        if self.contracts <= 0:
+            self.contracts, self.premium = 0, 0.0
+
+    def on_fill(self, symbol, expiry, quantity, price):
+        """Add bought contracts to the exposure"""
+        self._apply(symbol, expiry, quantity, quantity * price * self.multiplier)
+
+    def reserve(self, symbol, expiry, quantity, price):
+        """Count an order's exposure while it is working; returns the reservation to release"""
+        premium = quantity * price * self.multiplier
+        self._apply(symbol, expiry, quantity, premium)
+        return symbol, expiry, quantity, premium
+
+    def release(self, reservation):
+        """Drop a reservation once its order is done; what filled is added with on_fill"""
+        symbol, expiry, quantity, premium = reservation
+        self._apply(symbol, expiry, -quantity, -premium)
+
+    def on_exit(self, symbol, expiry, quantity, entry_price, exit_price):
+        """Remove sold contracts at their average cost and realize the P&L"""
+        self._apply(symbol, expiry, -quantity, -quantity * entry_price * self.multiplier)
+        self.realize(quantity, entry_price, exit_price)
+
+    def realize(self, quantity, entry_price, exit_price, ts=None):
+        """Add a closed trade to today's P&L; one with a timestamp (time.time()) before today is ignored"""
+        self._roll()
+        if ts is None or ts >= self.day_start:
+            self.realized_pnl += (exit_price - entry_price) * quantity * self.multiplier
+
+    def count_signal(self, source):
+        """Count a signal from a source account; returns its count for today"""
+        self._roll()
+        count = self.signals.get(source, 0) + 1
+        self.signals[source] = count
+        return count
+
+    def check(self, symbol, expiry, quantity, price, source=None):
+        """Reason the entry would break a limit, or None if it may go ahead"""
+        self._roll()
+        premium = quantity * price * self.multiplier
+        underlying = self.underlyings.get(symbol.upper(), (0, 0.0))
+        by_expiry = self.expiries.get(expiry, (0, 0.0))
+        if self.max_daily_loss and -self.realized_pnl >= self.max_daily_loss:
+            reason = f"daily loss {-self.realized_pnl:.2f} reached the limit of {self.max_daily_loss}"
+        elif self.max_signals_per_source and source is not None \
+                and self.signals.get(source, 0) > self.max_signals_per_source:
+            reason = f"source {source} sent more than {self.max_signals_per_source} signals today"
+        elif self.max_contracts and self.contracts + quantity > self.max_contracts:
+            reason = f"account would hold {self.contracts + quantity} contracts"
+        elif self.max_premium and self.premium + premium > self.max_premium:
+            reason = f"account premium at risk would be {self.premium + premium:.2f}"
+        elif self.max_contracts_per_underlying and underlying[0] + quantity > self.max_contracts_per_underlying:
+            reason = f"{symbol} would hold {underlying[0] + quantity} contracts"
+        elif self.max_premium_per_underlying and underlying[1] + premium > self.max_premium_per_underlying:
+            reason = f"{symbol} premium at risk would be {underlying[1] + premium:.2f}"
+        elif self.max_contracts_per_expiry and by_expiry[0] + quantity > self.max_contracts_per_expiry:
+            reason = f"expiry {expiry} would hold {by_expiry[0] + quantity} contracts"
+        elif self.max_premium_per_expiry and by_expiry[1] + premium > self.max_premium_per_expiry:
+            reason = f"expiry {expiry} premium at risk would be {by_expiry[1] + premium:.2f}"
+        else:
+            return None
+        self.rejected += 1
+        return reason
+
+    def snapshot(self):
+        """Account-wide aggregates, for the metrics endpoint"""
+        return {
+            'contracts': self.contracts,
+            'premium': round(self.premium, 2),
+            'realized_pnl': round(self.realized_pnl, 2),
+            'underlyings': len(self.underlyings),
+            'rejected': self.rejected,
+        }
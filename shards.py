@@ -0,0 +1,202 @@
+import asyncio
+import logging
+import multiprocessing
+import os
+import queue
+import threading
+import zlib
+from ib_insync import util
+import config
+from latency import recorder
+from log_setup import setup_logging, stop_logging
+from pipeline import SignalPipeline
+from position_journal import PositionJournal
+from trader import Trader
+from tweet_parser import OptionSignal, TweetParser
+
+logger = logging.getLogger(__name__)
+
+
+def shard_for(symbol, count):
+    """Shard that owns an underlying; stable across processes and restarts"""
+    return zlib.crc32(symbol.upper().encode()) % count
+
+
+def shard_path(path, shard):
+    """Per-shard variant of a file path, e.g. positions.db -> positions-2.db"""
+    if not path or path == ':memory:':
+        return path
+    root, ext = os.path.splitext(path)
+    return f"{root}-{shard}{ext}"
+
+
+class ReportingJournal(PositionJournal):
+    """PositionJournal that also sends every event to the coordinator"""
+
+    def __init__(self, path, shard, events):
+        super().__init__(path)
+        self.shard = shard
+        self.events = events
+
+    def record(self, event, key, contract=None, quantity=0, price=0.0):
+        super().record(event, key, contract, quantity, price)
+        self.events.put((self.shard, event, key, quantity, price))
+
+
+class GlobalPositions:
+    """Aggregate view of the positions held by every shard, rebuilt from journal events"""
+
+    def __init__(self):
+        self.positions = {}  # key -> [shard, quantity, average price]
+        self.lock = threading.Lock()
+
+    def apply(self, shard, event, key, quantity, price):
+        with self.lock:
+            position = self.positions.get(key)
+            if event == 'snapshot' or (event == 'entry' and position is None):
+                self.positions[key] = [shard, quantity, price]
+            elif position is None:
+                return
+            elif event in ('entry', 'average_down'):
+                total = position[1] + quantity
+                position[2] = (position[2] * position[1] + price * quantity) / total if total else price
+                position[1] = total
+            elif event == 'exit':
+                position[1] -= quantity
+            elif event == 'reconcile':
+                position[1] = quantity
+            elif event == 'close':
+                del self.positions[key]
+
+    def snapshot(self):
+        """{key: (shard, quantity, average price)} across all shards"""
+        with self.lock:
+            return {key: tuple(position) for key, position in self.positions.items()}
+
+    def __len__(self):
+        return len(self.positions)
+
+
+def run_shard(shard, count, client_id, signals, events):
+    """Worker process: one Trader and IB connection executing the signals of one shard"""
+    setup_logging(config.LOG_LEVEL, shard_path(config.LOG_PATH, shard),
+                  shard_path(config.TRADE_JOURNAL_PATH, shard), config.TWEET_LOG_SAMPLE_RATE)
+    trader = Trader(
+        contract_cache_path=shard_path(config.CONTRACT_CACHE_PATH, shard),
+        client_id=client_id,
+        journal=ReportingJournal(shard_path(config.JOURNAL_PATH, shard), shard, events)
+    )
+    trader.risk.split(count)
+    trader.initialize_client()
+    book = trader.positions
+    for key, slot in book.slots.items():
+        events.put((shard, 'snapshot', key, int(book.quantity[slot]), float(book.entry_price[slot])))
+
+    loop = util.getLoop()
+    pipeline = SignalPipeline(
+        TweetParser(),
+        trader,
+        queue_size=config.PIPELINE_QUEUE_SIZE,
+        max_in_flight=config.PIPELINE_MAX_IN_FLIGHT,
+        submit_timeout=config.PIPELINE_SUBMIT_TIMEOUT
+    )
+    pipeline.start(loop)
+    if config.METRICS_DUMP_PATH:
+        recorder.start_dump(shard_path(config.METRICS_DUMP_PATH, shard), config.METRICS_DUMP_INTERVAL)
+
+    def read_signals():
+        while True:
+            item = signals.get()
+            if item is None:
+                loop.call_soon_threadsafe(loop.stop)
+                return
+            fields, received_at, author = item
+            signal = OptionSignal(*fields)
+            signal.received_at = received_at
+            signal.author = author
+            pipeline.submit_signal(signal)
+
+    threading.Thread(target=read_signals, name=f"shard-{shard}-reader", daemon=True).start()
+    logger.info("Shard %s running with client ID %s", shard, client_id)
+    try:
+        util.run()
+    except KeyboardInterrupt:
+        pass
+    finally:
+        pipeline.stop()
+        trader.cleanup()
+        stop_logging()
+
+
+class ShardedTrader:
+    """Runs execution in ``count`` worker processes, sharded by underlying symbol.
+
+    Stands in for the Trader in the coordinator's SignalPipeline, which
+    keeps ingest, parsing and validation: ``execute_option_trade`` only
+    pickles the signal onto the owning shard's queue. The queues hold at
+    most ``queue_size`` signals, so a busy shard pushes back on the
+    pipeline through its in-flight limit. Each worker connects
+    with client ID ``base_client_id + shard`` and keeps its own contract
+    cache and position journal. Journal events stream back over a shared
+    queue into ``positions``, the global view across shards. Each worker
+    enforces an equal share of the account-wide and per-expiry risk limits
+    (see RiskEngine.split), so together they stay within the configured totals.
+    """
+
+    def __init__(self, count, base_client_id=config.IB_CLIENT_ID, queue_size=100):
+        self.count = count
+        self.base_client_id = base_client_id
+        self.context = multiprocessing.get_context('spawn')
+        self.signals = [self.context.Queue(queue_size) for _ in range(count)]
+        self.events = self.context.Queue()
+        self.workers = []
+        self.positions = GlobalPositions()
+        self._collector = None
+
+    def initialize_client(self):
+        """Start the worker processes and the thread collecting their position events"""
+        for shard in range(self.count):
+            worker = self.context.Process(
+                target=run_shard,
+                args=(shard, self.count, self.base_client_id + shard, self.signals[shard], self.events),
+                name=f"shard-{shard}",
+                daemon=True
+            )
+            worker.start()
+            self.workers.append(worker)
+        self._collector = threading.Thread(target=self._collect, name="shard-events", daemon=True)
+        self._collector.start()
+        logger.info("Started %s execution shards", self.count)
+
+    def _collect(self):
+        while True:
+            item = self.events.get()
+            if item is None:
+                return
+            self.positions.apply(*item)
+
+    async def execute_option_trade(self, signal):
+        """Dispatch a signal to the shard that owns its underlying; returns None as the outcome is the shard's"""
+        shard = shard_for(signal.symbol, self.count)
+        fields = tuple(getattr(signal, name) for name in OptionSignal.FIELDS)
+        # Waits in a thread while the shard's queue is full, keeping the loop free
+        await asyncio.get_event_loop().run_in_executor(
+            None, self.signals[shard].put, (fields, signal.received_at, signal.author))
+        logger.info("Dispatched %s to shard %s", signal, shard)
+        return None
+
+    def cleanup(self, timeout=5):
+        """Stop every worker, letting each finish its own cleanup"""
+        for shard, worker in enumerate(self.workers):
+            try:
+                self.signals[shard].put(None, timeout=timeout)
+            except queue.Full:
+                # Stuck or dead with a full queue; it would never read the stop marker
+                logger.warning("Shard %s is not taking signals, terminating it", shard)
+                worker.terminate()
+        for worker in self.workers:
+            worker.join(timeout=10)
+            if worker.is_alive():
+                worker.terminate()
+        self.events.put(None)
+        logger.info("Stopped %s execution shards holding %s positions", self.count, len(self.positions))
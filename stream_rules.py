@@ -0,0 +1,123 @@
+import logging
+import os
+import re
+import threading
+import tweepy
+
+logger = logging.getLogger(__name__)
+
+FROM_PATTERN = re.compile(r'from:(\w+)')
+FROM_ONLY_RULE = re.compile(r'^from:\w+( OR from:\w+)*$')
+
+
+def load_watchlist(path):
+    """User IDs from a watchlist file: one per line, blank lines and # comments ignored"""
+    with open(path) as f:
+        lines = (line.split('#', 1)[0].strip() for line in f)
+        return [line for line in lines if line]
+
+
+class StreamRuleManager:
+    """Keeps the filtered stream's rules in line with a watchlist of user IDs.
+
+    Users are packed into as few ``from:a OR from:b`` rules as fit
+    ``max_rule_length``. The stream's rules are fetched once; after that
+    ``sync`` diffs against the rules we know about and sends at most one
+    batched delete and one batched add. Rules whose users are all still
+    watched are kept as they are, so adding or dropping a user only
+    rewrites the rules it touches. Rules carry ``tag`` and rules with other
+    tags are left alone. Untagged rules made only of ``from:`` clauses, as
+    created by earlier versions, are adopted and kept or deleted like ours.
+    """
+
+    def __init__(self, stream, max_rule_length=512, max_rules=25, tag='watchlist'):
+        self.stream = stream
+        self.max_rule_length = max_rule_length
+        self.max_rules = max_rules
+        self.tag = tag
+        self.rules = None  # rule ID -> user IDs it matches, None until fetched
+        self.calls = 0  # Rule API requests sent
+        self._stop = threading.Event()
+
+    def pack(self, user_ids):
+        """Pack user IDs into as few from:a OR from:b rule values as fit the length limit"""
+        rules, current, length = [], [], 0
+        for user_id in user_ids:
+            clause_length = len(user_id) + 5 + (4 if current else 0)  # "from:" and " OR "
+            if current and length + clause_length > self.max_rule_length:
+                rules.append(" OR ".join(f"from:{u}" for u in current))
+                current, length = [], 0
+                clause_length -= 4
+            current.append(user_id)
+            length += clause_length
+        if current:
+            rules.append(" OR ".join(f"from:{u}" for u in current))
+        return rules
+
+    def fetch(self):
+        """Load the stream's current rules; only ours and untagged from: rules are tracked"""
+        response = self.stream.get_rules()
+        self.calls += 1
+        self.rules = {}
+        for rule in response.data or ():
+            if rule.tag == self.tag or (not rule.tag and FROM_ONLY_RULE.match(rule.value.strip())):
+                self.rules[rule.id] = FROM_PATTERN.findall(rule.value)
+        return self.rules
+
+    def sync(self, user_ids):
+        """Apply the difference between the current rules and ``user_ids``; returns (added, deleted) rule counts"""
+        if self.rules is None:
+            self.fetch()
+        wanted = set(str(user_id) for user_id in user_ids)
+
+        # Keep rules that only match watched users, each user covered once
+        covered, stale = set(), []
+        for rule_id, users in self.rules.items():
+            if users and wanted.issuperset(users) and covered.isdisjoint(users):
+                covered.update(users)
+            else:
+                stale.append(rule_id)
+        new_rules = self.pack(sorted(wanted - covered))
+
+        if len(self.rules) - len(stale) + len(new_rules) > self.max_rules:
+            logger.warning("Watchlist needs %s stream rules, more than the limit of %s",
+                           len(self.rules) - len(stale) + len(new_rules), self.max_rules)
+
+        if stale:
+            self.stream.delete_rules(stale)
+            self.calls += 1
+            for rule_id in stale:
+                del self.rules[rule_id]
+        if new_rules:
+            response = self.stream.add_rules([tweepy.StreamRule(value, tag=self.tag) for value in new_rules])
+            self.calls += 1
+            for error in response.errors or ():
+                logger.error("Stream rule rejected: %s", error)
+            for rule in response.data or ():
+                self.rules[rule.id] = FROM_PATTERN.findall(rule.value)
+
+        if stale or new_rules:
+            logger.info("Stream rules updated for %s users: %s added, %s deleted",
+                        len(wanted), len(new_rules), len(stale))
+        return len(new_rules), len(stale)
+
+    def watch(self, path, base_user_ids=(), interval=30):
+        """Re-sync whenever the watchlist file changes, on a daemon thread"""
+        def run():
+            modified = None
+            while not self._stop.wait(interval):
+                try:
+                    mtime = os.path.getmtime(path)
+                    if mtime == modified:
+                        continue
+                    modified = mtime
+                    self.sync(list(base_user_ids) + load_watchlist(path))
+                except Exception as e:
+                    logger.error("Error reloading watchlist %s: %s", path, e)
+
+        thread = threading.Thread(target=run, name="watchlist-reload", daemon=True)
+        thread.start()
+        return thread
+
+    def stop(self):
+        self._stop.set()
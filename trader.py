@@ -1,63 +1,180 @@
 from ib_insync import *
-from datetime import datetime, timedelta
-import time
+import asyncio
 import logging
-from config import IB_HOST, IB_PORT, IB_CLIENT_ID
-
-# Configure logging
-logging.basicConfig(
-    level=logging.INFO,
-    format='%(asctime)s - %(levelname)s - %(message)s',
-    handlers=[
-        logging.FileHandler('trading.log'),
-        logging.StreamHandler()
-    ]
-)
+import time
+import numpy as np
+import config
+from config import (IB_HOST, IB_PORT, IB_CLIENT_ID, QUOTE_MAX_LINES, QUOTE_WAIT_TIMEOUT,
+                    CONTRACT_CACHE_PATH, CONTRACT_CACHE_TTL_DAYS, ORDER_ACK_TIMEOUT, ORDER_FILL_TIMEOUT,
+                    JOURNAL_PATH, TRAILING_STOP_AMEND_INTERVAL, TRAILING_STOP_MAX_AMENDS,
+                    SCHEDULER_RATE, SCHEDULER_BURST, SCHEDULER_RESERVE)
+from quote_manager import QuoteManager
+from contract_cache import ContractCache
+from position_book import PositionBook
+from position_journal import PositionJournal
+from order_manager import OrderManager
+from entry_engine import EntryEngine
+from trailing_stops import TrailingStopEngine
+from request_scheduler import ENTRY, RequestScheduler
+from risk_engine import RiskEngine
+from latency import recorder
 
 class Trader:
-    def __init__(self):
-        self.ib = IB()
-        self.positions = {}  # Track positions and their details
-        self.profit_targets = {
-            'target1': 0.15,  # 15% profit
-            'target2': 0.30,  # 30% profit
-            'target3': 0.50   # 50% profit
-        }
-        self.average_down_threshold = -0.40  # 40% down triggers averaging down
-        self.position_sizes = {
-            'initial': 1,     # Start with 1 contract
-            'average': 1      # Add 1 contract at a time
-        }
-        self.max_contracts = 3  # Maximum number of contracts
-        self.max_wait_time = 30  # Maximum wait time in minutes
-        self.price_margin = 0.02  # Maximum price deviation in dollars
-        self.trailing_stop_percentage = 0.10  # 10% trailing stop
+    def __init__(self, ib=None, contract_cache_path=CONTRACT_CACHE_PATH, journal_path=JOURNAL_PATH,
+                 client_id=IB_CLIENT_ID, journal=None):
+        # Any object implementing the IB API subset we use (e.g. fake_broker.FakeIB) can be passed in
+        self.ib = ib or IB()
+        self.client_id = client_id  # Each sharded worker connects with its own client ID
+        # Every request to IB is paced through one scheduler
+        self.scheduler = RequestScheduler(SCHEDULER_RATE, SCHEDULER_BURST, SCHEDULER_RESERVE)
+        recorder.gauge('scheduler_queue', self.scheduler.depths)
+        self.quotes = QuoteManager(self.ib, max_lines=QUOTE_MAX_LINES, wait_timeout=QUOTE_WAIT_TIMEOUT,
+                                   scheduler=self.scheduler)
+        self.contracts = ContractCache(self.ib, contract_cache_path, ttl_days=CONTRACT_CACHE_TTL_DAYS,
+                                       scheduler=self.scheduler)
+        self.orders = OrderManager(self.ib, scheduler=self.scheduler)
+        self.exits = {}  # conId -> Trades of the position's working exit orders
+        self.entries = EntryEngine()  # Signals waiting for their entry price
+        # Survives restarts; replayed in restore_positions
+        self.journal = journal or PositionJournal(journal_path)
+        # Strategy parameters (shared with the backtester through config)
+        self.profit_targets = dict(config.PROFIT_TARGETS)
+        self.average_down_threshold = config.AVERAGE_DOWN_THRESHOLD
+        self.position_sizes = dict(config.POSITION_SIZES)
+        self.max_contracts = config.MAX_CONTRACTS
+        self.max_wait_time = config.MAX_WAIT_TIME
+        self.entry_retry_delay = config.ENTRY_RETRY_DELAY
+        self.price_margin = config.PRICE_MARGIN
+        self.trailing_stop_percentage = config.TRAILING_STOP_PERCENTAGE
+        self.trailing_stop_mode = config.TRAILING_STOP_MODE
+        self.trailing_stop_limit_offset = config.TRAILING_STOP_LIMIT_OFFSET
+        # Raises the STP exit orders in 'client' trailing stop mode
+        self.trailing = TrailingStopEngine(self.ib, self.exits, interval=TRAILING_STOP_AMEND_INTERVAL,
+                                           max_amends=TRAILING_STOP_MAX_AMENDS, scheduler=self.scheduler)
+        self.positions = PositionBook(  # Track positions and their details
+            self.profit_targets.values(),
+            self.average_down_threshold,
+            self.trailing_stop_percentage,
+            self.max_contracts
+        )
+        # Exposure aggregates, updated on every fill and exit
+        self.risk = RiskEngine(
+            max_contracts_per_underlying=config.RISK_MAX_CONTRACTS_PER_UNDERLYING,
+            max_premium_per_underlying=config.RISK_MAX_PREMIUM_PER_UNDERLYING,
+            max_contracts_per_expiry=config.RISK_MAX_CONTRACTS_PER_EXPIRY,
+            max_premium_per_expiry=config.RISK_MAX_PREMIUM_PER_EXPIRY,
+            max_contracts=config.RISK_MAX_CONTRACTS,
+            max_premium=config.RISK_MAX_PREMIUM,
+            max_daily_loss=config.RISK_MAX_DAILY_LOSS,
+            max_signals_per_source=config.RISK_MAX_SIGNALS_PER_SOURCE
+        )
+        self.risk_recheck_interval = config.RISK_RECHECK_INTERVAL
+        recorder.gauge('risk', self.risk.snapshot)
 
     def initialize_client(self):
         """Initialize connection to Interactive Brokers"""
         try:
-            self.ib.connect(IB_HOST, IB_PORT, clientId=IB_CLIENT_ID)
+            self.ib.connect(IB_HOST, IB_PORT, clientId=self.client_id)
             logging.info("Successfully connected to Interactive Brokers")
+            
+            # Re-evaluate every open position whenever new ticks arrive
+            self.ib.pendingTickersEvent += self.on_pending_tickers
+            # Track exit fills from the resting target/stop orders
+            self.ib.execDetailsEvent += self.on_exec_details
         except Exception as e:
-            logging.error(f"Failed to connect to Interactive Brokers: {str(e)}")
+            logging.error("Failed to connect to Interactive Brokers: %s", e)
             raise
+        
+        self.restore_positions()
+        if self.trailing_stop_mode == 'client':
+            self.trailing.start()
+
+    def restore_positions(self):
+        """Rebuild open positions from the journal and reconcile them with the broker"""
+        started = time.monotonic()
+        book = self.positions
+        for event, key, contract, quantity, price, ts in self.journal.replay():
+            if event == 'entry':
+                book.open(key, contract, quantity, price, ts)
+            elif key not in book:
+                continue
+            elif event == 'average_down':
+                slot = book.slots[key]
+                book.add_fill(slot, quantity, price)
+                book.averaged_down[slot] = True
+            elif event == 'exit':
+                book.reduce(book.slots[key], quantity)
+            elif event == 'reconcile':
+                book.quantity[book.slots[key]] = quantity
+
+        # Today's realized P&L includes positions that have since been closed
+        for quantity, entry_price, exit_price in self.journal.exits_since(self.risk.day_start):
+            self.risk.realize(quantity, entry_price, exit_price)
+
+        # One bulk request each for positions and open orders
+        held = {p.contract.conId: int(p.position) for p in self.ib.reqPositions()}
+        for trade in self.ib.reqOpenOrders():
+            if trade.order.action == 'SELL':
+                self.exits.setdefault(trade.contract.conId, []).append(trade)
+        
+        for key, slot in list(book.slots.items()):
+            contract = book.contracts[slot]
+            quantity = held.get(contract.conId, 0)
+            if quantity <= 0:
+                logging.info("%s is no longer held at the broker, closing it", key)
+                book.close(key)
+                self.journal.record('close', key)
+                continue
+            if quantity != book.quantity[slot]:
+                logging.warning("%s: journal has %s contracts, broker has %s",
+                                key, book.quantity[slot], quantity)
+                book.quantity[slot] = quantity
+                self.journal.record('reconcile', key, quantity=quantity)
+            self.risk.on_fill(contract.symbol, contract.lastTradeDateOrContractMonth, quantity,
+                              float(book.entry_price[slot]))
+            self.quotes.pin(contract)
+            stops = [t.order.auxPrice for t in self.exits.get(contract.conId, ()) if t.order.orderType == 'STP']
+            if stops:
+                book.stop_price[slot] = max(stops)
+            if contract.conId not in self.exits:
+                # The exit orders died with the old session; put them back
+                asyncio.ensure_future(self.setup_profit_targets(contract, float(book.entry_price[slot]), quantity))
+        
+        logging.info("Restored %s open positions in %.0fms", len(book), (time.monotonic() - started) * 1000)
+
+    def on_exec_details(self, trade, fill):
+        """Reduce a position when one of its exit orders fills"""
+        if trade.order.action != 'SELL':
+            return
+        book = self.positions
+        slot = book.by_con_id.get(trade.contract.conId)
+        if slot is None:
+            return
+        key = book.keys[slot]
+        contract = book.contracts[slot]
+        self.risk.on_exit(contract.symbol, contract.lastTradeDateOrContractMonth, int(fill.execution.shares),
+                          float(book.entry_price[slot]), fill.execution.price)
+        remaining = book.reduce(slot, int(fill.execution.shares))
+        self.journal.record('exit', key, quantity=int(fill.execution.shares), price=fill.execution.price)
+        if remaining == 0:
+            book.close(key)
+            self.cancel_exits(contract.conId)
+            self.release_quotes(key, contract)
+            self.journal.record('close', key)
+            logging.info("Position closed: %s", key)
 
-    def get_option_quote(self, symbol, expiry, strike, option_type):
+    async def get_option_quote(self, symbol, expiry, strike, option_type):
         """Get current quote for an option"""
         try:
-            # Create option contract
-            contract = Option(symbol, expiry, strike, option_type, 'SMART', '100')
-            self.ib.qualifyContracts(contract)
+            # Resolve the qualified contract from the cache
+            contract = await self.contracts.resolve(symbol, expiry, strike, option_type)
+            if contract is None:
+                return None
             
-            # Request market data
-            ticker = self.ib.reqMktData(contract)
-            self.ib.sleep(2)  # Wait for data
-            
-            if ticker.last:
-                return ticker.last
-            return None
+            # Read from the contract's streaming subscription
+            return await self.quotes.get_price(contract)
         except Exception as e:
-            logging.error(f"Error getting option quote: {str(e)}")
+            logging.error("Error getting option quote: %s", e)
             return None
 
     def calculate_position_size(self, current_price, is_average_down=False):
@@ -65,171 +182,382 @@ class Trader:
         base_size = self.position_sizes['average'] if is_average_down else self.position_sizes['initial']
         return base_size
 
-    def place_limit_order(self, contract, quantity, limit_price, action='BUY'):
-        """Place a limit order"""
+    async def place_limit_order(self, contract, quantity, limit_price, action='BUY'):
+        """Place a limit order.
+
+        Returns the OrderState as soon as the order fills, or None if nothing
+        filled within ORDER_FILL_TIMEOUT, in which case the rest is cancelled;
+        a partial fill is returned as is.
+        """
         try:
             order = LimitOrder(action, quantity, limit_price)
-            trade = self.ib.placeOrder(contract, order)
-            self.ib.sleep(1)  # Wait for order to be placed
+            state = await self.orders.submit(contract, order)
             
-            if trade.orderStatus.status == 'Filled':
-                logging.info(f"Order filled: {action} {quantity} {contract.symbol} at {limit_price}")
-                return True
+            if await self.orders.wait_filled(state, ORDER_FILL_TIMEOUT):
+                logging.info("Order filled: %s %s %s at %s",
+                             action, state.filled, contract.symbol, state.avg_fill_price)
+                return state
             else:
-                logging.warning(f"Order not filled: {trade.orderStatus.status}")
-                return False
+                logging.warning("Order not filled: %s", state.trade.orderStatus.status)
+                return None
         except Exception as e:
-            logging.error(f"Error placing order: {str(e)}")
-            return False
+            logging.error("Error placing order: %s", e)
+            return None
+
+    def stop_price(self, entry_price):
+        """Initial protective stop for a position bought at entry_price"""
+        return round(entry_price * (1 - self.trailing_stop_percentage), 2)
+
+    def stop_order(self, stop_price, **kwargs):
+        """Protective stop for one contract.
+
+        In 'native' mode this is an IB TRAIL (or TRAIL LIMIT) order that the
+        broker ratchets up itself; in 'client' mode it is a plain STP order
+        raised by the TrailingStopEngine.
+        """
+        if self.trailing_stop_mode != 'native':
+            return StopOrder('SELL', 1, stop_price, **kwargs)
+        order = Order(action='SELL', totalQuantity=1, orderType='TRAIL',
+                      trailingPercent=self.trailing_stop_percentage * 100, trailStopPrice=stop_price, **kwargs)
+        if self.trailing_stop_limit_offset:
+            order.orderType = 'TRAIL LIMIT'
+            order.lmtPriceOffset = self.trailing_stop_limit_offset
+        return order
+
+    def exit_orders(self, entry_price, quantity, group):
+        """Exit legs for a position: per contract, an optional profit target and a protective stop.
+
+        Both legs of a contract share an OCA group (ocaType 1: a fill cancels
+        the rest), so a stop fill never leaves that contract's target working.
+        With 3+ contracts one sells at each target, with 2 one sells at
+        target2, and the others only carry the stop.
+        """
+        targets = list(self.profit_targets.values())
+        stop_price = self.stop_price(entry_price)
+        orders = []
+        for lot in range(quantity):
+            oca = {'ocaGroup': f"{group}-{lot}", 'ocaType': 1}
+            if quantity >= 3 and lot < len(targets):
+                target = targets[lot]
+            elif quantity == 2 and lot == 0:
+                target = self.profit_targets['target2']
+            else:
+                target = None
+            if target is not None:
+                orders.append(LimitOrder('SELL', 1, round(entry_price * (1 + target), 2), **oca))
+            orders.append(self.stop_order(stop_price, **oca))
+        return orders
+
+    async def submit_orders(self, contract, orders):
+        """Send orders back to back and return their OrderStates.
 
-    def place_trailing_stop(self, contract, quantity, trailing_percent):
-        """Place a trailing stop order"""
+        They are queued in the scheduler's order lane together and leave in
+        order. Orders with ``transmit=False`` are held by the broker until a
+        later one transmits, so a parent and its attached legs go out together.
+        """
+        return await asyncio.gather(*(self.orders.submit(contract, order) for order in orders))
+
+    def cancel_exits(self, con_id):
+        """Cancel the working exit orders of a contract"""
+        for trade in self.exits.pop(con_id, ()):
+            if trade.isActive():
+                self.orders.cancel(trade.order)
+
+    async def place_bracket(self, contract, quantity, limit_price):
+        """Place an entry with its exit ladder attached as a native bracket.
+
+        The exit legs are children of the entry (parentId) and the broker only
+        activates them when it fills, so the position is protected without a
+        round trip from here. Returns the entry's OrderState once it fills,
+        None if nothing filled within ORDER_FILL_TIMEOUT (cancelling the entry
+        cancels its legs with it), or False if the broker rejected or
+        cancelled the entry before then.
+        """
         try:
-            # Get current price
-            current_price = self.get_option_quote(
-                contract.symbol,
-                contract.lastTradeDateOrContractMonth,
-                contract.strike,
-                contract.right
-            )
+            parent = LimitOrder('BUY', quantity, limit_price, orderId=self.ib.client.getReqId(),
+                                transmit=False)
+            legs = self.exit_orders(limit_price, quantity, f"exit-{parent.orderId}")
+            for leg in legs:
+                leg.parentId = parent.orderId
+                leg.transmit = False
+            legs[-1].transmit = True
+            entry, *exits = await self.submit_orders(contract, [parent] + legs)
             
-            if current_price:
-                # Calculate trailing stop price
-                stop_price = current_price * (1 - trailing_percent)
-                
-                # Create trailing stop order
-                order = StopOrder('SELL', quantity, stop_price)
-                trade = self.ib.placeOrder(contract, order)
-                self.ib.sleep(1)
-                
-                if trade.orderStatus.status == 'Submitted':
-                    logging.info(f"Placed trailing stop order at {stop_price}")
-                    return True
-                else:
-                    logging.warning(f"Failed to place trailing stop: {trade.orderStatus.status}")
+            started = time.monotonic()
+            filled = await self.orders.wait_filled(entry, ORDER_FILL_TIMEOUT)
+            if not filled:
+                status = entry.trade.orderStatus.status
+                if status == 'Inactive' or time.monotonic() - started < ORDER_FILL_TIMEOUT:
+                    # Ended by the broker, not by our fill timeout
+                    message = entry.trade.log[-1].message if entry.trade.log else ''
+                    logging.error("Entry rejected by the broker: %s %s", status, message)
                     return False
+                logging.warning("Order not filled: %s", status)
+                return None
+            if filled < quantity:
+                # The legs were sized for the full entry; the caller re-ladders what filled
+                for state in exits:
+                    self.orders.cancel(state.trade.order)
+            else:
+                self.exits.setdefault(contract.conId, []).extend(state.trade for state in exits)
+            logging.info("Order filled: BUY %s %s at %s with %s exit orders attached",
+                         entry.filled, contract.symbol, entry.avg_fill_price, len(legs))
+            return entry
         except Exception as e:
-            logging.error(f"Error placing trailing stop: {str(e)}")
+            logging.error("Error placing bracket: %s", e)
+            return None
+
+    async def setup_profit_targets(self, contract, entry_price, quantity):
+        """Replace the exit ladder of a position that is already held.
+
+        Any previous exit orders are cancelled, then every leg is sent at
+        once and the acknowledgements are awaited together.
+        """
+        try:
+            self.cancel_exits(contract.conId)
+            orders = self.exit_orders(entry_price, quantity, f"exit-{contract.conId}-{time.time_ns()}")
+            states = await self.submit_orders(contract, orders)
+            self.exits[contract.conId] = [state.trade for state in states]
+            slot = self.positions.by_con_id.get(contract.conId)
+            if slot is not None:
+                self.positions.stop_price[slot] = self.stop_price(entry_price)
+            
+            acked = await asyncio.gather(*(self.orders.wait_acked(state, ORDER_ACK_TIMEOUT) for state in states))
+            if not all(acked):
+                logging.warning("%s of %s exit orders not acknowledged for %s",
+                                acked.count(False), len(orders), contract.localSymbol or contract.symbol)
+                return False
+            logging.info("Placed %s exit orders for %s contracts of %s from %s",
+                         len(orders), quantity, contract.localSymbol or contract.symbol, entry_price)
+            return True
+        except Exception as e:
+            logging.error("Error placing exit orders: %s", e)
             return False
 
-    def setup_profit_targets(self, contract, entry_price, quantity):
-        """Set up limit sell orders at different profit targets"""
-        # For multiple contracts, we'll sell at different targets
-        if quantity >= 3:
-            # Sell 1 contract at each target
-            for target_name, target_percentage in self.profit_targets.items():
-                target_price = entry_price * (1 + target_percentage)
-                self.place_limit_order(contract, 1, target_price, 'SELL')
-                logging.info(f"Placed {target_name} limit sell order at {target_price}")
-        elif quantity == 2:
-            # Sell 1 contract at 30% and keep 1 for trailing stop
-            target_price = entry_price * (1 + self.profit_targets['target2'])
-            self.place_limit_order(contract, 1, target_price, 'SELL')
-            logging.info(f"Placed target2 limit sell order at {target_price}")
-        else:
-            # For 1 contract, use trailing stop
-            self.place_trailing_stop(contract, 1, self.trailing_stop_percentage)
-
-    def check_and_average_down(self, contract, position):
-        """Check if position needs averaging down and execute if necessary"""
-        if position['quantity'] >= self.max_contracts:
-            logging.info("Maximum contracts reached, no more averaging down")
+    def on_pending_tickers(self, tickers):
+        """Feed a batch of ticks into pending entries and the position book"""
+        if self.entries.by_con_id:
+            for ticker in tickers:
+                if ticker.contract.conId in self.entries.by_con_id:
+                    self.entries.on_tick(ticker.contract.conId, QuoteManager.ticker_price(ticker))
+        if not len(self.positions):
             return
-
-        current_price = self.get_option_quote(
-            contract.symbol,
-            contract.lastTradeDateOrContractMonth,
-            contract.strike,
-            contract.right
+        self.positions.update_prices(
+            [ticker.contract.conId for ticker in tickers],
+            [QuoteManager.ticker_price(ticker) or 0.0 for ticker in tickers]
         )
-        
-        if current_price:
-            price_change = (current_price - position['entry_price']) / position['entry_price']
+        self.evaluate_positions()
+
+    def evaluate_positions(self):
+        """Run one vectorized pass over all open positions"""
+        book = self.positions
+        result = book.evaluate()
+
+        for slot in result.average_down:
+            book.busy[slot] = True
+            asyncio.ensure_future(self.average_down(slot))
+
+        for slot in result.profit_targets:
+            logging.info("%s reached profit target %s at %s",
+                         book.keys[slot], book.targets_hit[slot], book.last_price[slot])
+
+        for slot in result.trailing_stops:
+            logging.info("%s fell %.0f%% from its high of %s to %s", book.keys[slot],
+                         self.trailing_stop_percentage * 100, book.high_water[slot], book.last_price[slot])
+
+        if self.trailing_stop_mode == 'client':
+            # Queue a stop raise for every position whose high-water mark moved its stop up
+            n = book.size
+            stops = book.stop_price[:n]
+            trailed = np.round(book.high_water[:n] * (1 - book.trailing_stop[:n]), 2)
+            raised = np.flatnonzero(book.active[:n] & (stops > 0) & (trailed > stops))
+            if len(raised):
+                stops[raised] = trailed[raised]
+                self.trailing.amend(book.con_id[raised], trailed[raised])
+
+    async def average_down(self, slot):
+        """Buy more of a position that crossed the average-down threshold"""
+        book = self.positions
+        # The slot can be closed and reused while the order is working; the key and conId identify the position
+        key = book.keys[slot]
+        contract = book.contracts[slot]
+        held = False
+        try:
+            current_price = float(book.last_price[slot])
+            new_quantity = self.calculate_position_size(current_price, is_average_down=True)
+            reason = self.risk.check(contract.symbol, contract.lastTradeDateOrContractMonth,
+                                     new_quantity, current_price)
+            if reason:
+                # Leave the slot busy so the following ticks don't retry until the recheck
+                logging.info("Not averaging down %s for %ss: %s", key, self.risk_recheck_interval, reason)
+                asyncio.get_event_loop().call_later(self.risk_recheck_interval, self.release_slot,
+                                                    slot, contract.conId)
+                held = True
+                return
             
-            if price_change <= self.average_down_threshold:
-                # Calculate new average price and position size
-                new_quantity = self.calculate_position_size(current_price, is_average_down=True)
-                new_average_price = (position['entry_price'] * position['quantity'] + 
-                                   current_price * new_quantity) / (position['quantity'] + new_quantity)
+            # Place average down order, its exposure reserved until it is done
+            reservation = self.risk.reserve(contract.symbol, contract.lastTradeDateOrContractMonth,
+                                            new_quantity, current_price)
+            try:
+                fill = await self.place_limit_order(contract, new_quantity, current_price, 'BUY')
+            finally:
+                self.risk.release(reservation)
+            if fill:
+                filled = int(fill.filled)
+                fill_price = fill.avg_fill_price or current_price
+                self.risk.on_fill(contract.symbol, contract.lastTradeDateOrContractMonth, filled, fill_price)
+                slot = book.slots.get(key)
+                if slot is None or book.con_id[slot] != contract.conId:
+                    # The position was closed (e.g. its stop filled) while buying; what
+                    # was bought is a new position and gets its own exits
+                    logging.warning("%s closed while averaging down; tracking the %s bought as a new position",
+                                    key, filled)
+                    slot = book.open(key, contract, filled, fill_price, time.time())
+                    book.stop_price[slot] = self.stop_price(fill_price)
+                    self.journal.record('entry', key, contract, filled, fill_price)
+                    self.quotes.pin(contract)
+                else:
+                    # Update position tracking with what actually filled
+                    book.add_fill(slot, filled, fill_price)
+                    book.averaged_down[slot] = True
+                    self.journal.record('average_down', key, quantity=filled, price=fill_price)
+                quantity = int(book.quantity[slot])
+                new_average_price = float(book.entry_price[slot])
                 
-                # Place average down order
-                if self.place_limit_order(contract, new_quantity, current_price, 'BUY'):
-                    # Update position tracking
-                    position['quantity'] += new_quantity
-                    position['entry_price'] = new_average_price
-                    position['averaged_down'] = True
-                    
-                    # Set up new profit targets based on new average price
-                    self.setup_profit_targets(contract, new_average_price, position['quantity'])
-                    logging.info(f"Averaged down position: new quantity={position['quantity']}, "
-                               f"new average price={new_average_price}")
+                # Replace the exit ladder at the new average price
+                await self.setup_profit_targets(contract, new_average_price, quantity)
+                logging.info("Averaged down position: new quantity=%s, new average price=%s",
+                             quantity, new_average_price)
+        except Exception as e:
+            logging.error("Error averaging down: %s", e)
+        finally:
+            slot = book.slots.get(key)
+            if not held and slot is not None and book.con_id[slot] == contract.conId:
+                book.busy[slot] = False
+
+    def release_slot(self, slot, con_id):
+        """Let a position be averaged down again, unless its slot now holds another contract"""
+        book = self.positions
+        if book.active[slot] and book.con_id[slot] == con_id:
+            book.busy[slot] = False
 
-    def execute_option_trade(self, signal):
-        """Execute an option trade based on the signal"""
+    async def execute_option_trade(self, signal):
+        """Execute an option trade based on the signal.
+
+        Runs as a coroutine on the ib_insync event loop so that many signals
+        can wait for their entry price concurrently. Returns True once the
+        entry order is filled, False otherwise.
+        """
         try:
             # Format option symbol
-            option_symbol = f"{signal['symbol']}{signal['expiry']}{signal['strike']}{signal['option_type']}"
+            option_symbol = f"{signal.symbol}{signal.expiry}{signal.strike}{signal.right}"
             
-            # Create option contract
-            contract = Option(
-                signal['symbol'],
-                signal['expiry'],
-                signal['strike'],
-                signal['option_type'],
-                'SMART',
-                '100'
+            # Pre-trade limits, checked again when the entry price is reached
+            if signal.author is not None:
+                self.risk.count_signal(signal.author)
+            reason = self.risk.check(signal.symbol, signal.expiry, self.calculate_position_size(signal.target_price),
+                                     signal.target_price, signal.author)
+            if reason:
+                logging.warning("Signal rejected by risk limits: %s (%s)", option_symbol, reason)
+                return False
+            
+            # Resolve the qualified option contract (cached across signals and restarts)
+            started = time.monotonic()
+            contract = await self.contracts.resolve(
+                signal.symbol,
+                signal.expiry,
+                signal.strike,
+                signal.right
             )
-            self.ib.qualifyContracts(contract)
+            recorder.since('qualify', started)
+            if contract is None:
+                logging.error("Unknown option contract: %s", option_symbol)
+                return False
             
             # Get target price from signal
-            target_price = signal['target_price']
-            start_time = datetime.now()
+            target_price = signal.target_price
+            limit_price = target_price + self.price_margin  # 1-2 cents higher max
+            deadline = time.monotonic() + self.max_wait_time * 60
             
-            # Try to execute trade within 30 minutes
-            while (datetime.now() - start_time).total_seconds() < (self.max_wait_time * 60):
-                current_price = self.get_option_quote(
-                    signal['symbol'],
-                    signal['expiry'],
-                    signal['strike'],
-                    signal['option_type']
-                )
+            # Keep the quotes streaming while the entry waits for its price
+            self.quotes.pin(contract, ENTRY)
+            started = time.monotonic()
+            current_price = await self.quotes.get_price(contract)
+            recorder.since('quote_wait', started)
+            
+            # Try to execute trade within 30 minutes, on the first tick at our price
+            while True:
+                current_price = await self.entries.wait(contract.conId, limit_price,
+                                                        deadline - time.monotonic(), current_price)
+                if current_price is None:
+                    break
                 
-                if current_price:
-                    # Check if price is within margin (1-2 cents higher max)
-                    if current_price <= target_price + self.price_margin:
-                        # Calculate position size (1 contract initially)
-                        quantity = self.calculate_position_size(current_price)
-                        
-                        # Place initial order
-                        if self.place_limit_order(contract, quantity, current_price, 'BUY'):
-                            # Track position
-                            self.positions[option_symbol] = {
-                                'contract': contract,
-                                'quantity': quantity,
-                                'entry_price': current_price,
-                                'averaged_down': False,
-                                'entry_time': datetime.now()
-                            }
-                            
-                            # Set up profit targets
-                            self.setup_profit_targets(contract, current_price, quantity)
-                            
-                            # Start monitoring for average down opportunity
-                            self.check_and_average_down(contract, self.positions[option_symbol])
-                            
-                            logging.info(f"Successfully executed trade: {option_symbol} at {current_price}")
-                            return
+                # Calculate position size (1 contract initially)
+                quantity = self.calculate_position_size(current_price)
+                reason = self.risk.check(signal.symbol, signal.expiry, quantity, current_price)
+                if reason:
+                    logging.warning("Entry blocked by risk limits: %s (%s)", option_symbol, reason)
+                    self.release_quotes(option_symbol, contract)
+                    return False
                 
-                # Wait 1 minute before next attempt
-                time.sleep(60)
+                # Place initial order with its exits attached; its exposure is
+                # reserved so entries crossing on the same tick see it
+                reservation = self.risk.reserve(signal.symbol, signal.expiry, quantity, current_price)
+                try:
+                    fill = await self.place_bracket(contract, quantity, current_price)
+                finally:
+                    self.risk.release(reservation)
+                if fill is False:
+                    # Sending it again on the next tick would only be rejected again
+                    logging.error("Giving up on %s after the broker rejected its entry", option_symbol)
+                    self.release_quotes(option_symbol, contract)
+                    return False
+                if fill and signal.received_at:
+                    recorder.record('tweet_to_order', fill.submitted_at - signal.received_at)
+                    recorder.record('tweet_to_ack', fill.acked_at - signal.received_at)
+                if fill:
+                    partial = fill.filled < quantity
+                    quantity = int(fill.filled)
+                    current_price = fill.avg_fill_price or current_price
+                    self.risk.on_fill(signal.symbol, signal.expiry, quantity, current_price)
+                    # Track position (its quotes stay pinned); the position
+                    # book is re-evaluated for averaging down on every tick
+                    slot = self.positions.open(option_symbol, contract, quantity, current_price, time.time())
+                    self.journal.record('entry', option_symbol, contract, quantity, current_price)
+                    self.positions.stop_price[slot] = self.stop_price(fill.trade.order.lmtPrice)
+                    
+                    if partial:
+                        # The bracket's legs were cancelled; ladder what was bought
+                        await self.setup_profit_targets(contract, float(self.positions.entry_price[slot]),
+                                                        int(self.positions.quantity[slot]))
+                    
+                    logging.info("Successfully executed trade: %s at %s", option_symbol, current_price)
+                    return True
+                
+                # The price moved away before the entry filled; back off, then wait for the next crossing
+                await asyncio.sleep(max(0, min(self.entry_retry_delay, deadline - time.monotonic())))
+                self.quotes.pin(contract, ENTRY)  # May have been released while no entry was waiting
+                current_price = None
             
-            logging.warning(f"Trade not executed within {self.max_wait_time} minutes: {option_symbol}")
+            logging.warning("Trade not executed within %s minutes: %s", self.max_wait_time, option_symbol)
+            self.release_quotes(option_symbol, contract)
+            return False
                 
         except Exception as e:
-            logging.error(f"Error executing trade: {str(e)}")
+            logging.error("Error executing trade: %s", e)
+            return False
+
+    def release_quotes(self, key, contract):
+        """Stop streaming a contract once nothing is held or waiting to enter on it"""
+        if key not in self.positions and not self.entries.waiting(contract.conId):
+            self.quotes.release(contract)
 
     def cleanup(self):
         """Clean up resources"""
+        self.trailing.stop()
         if self.ib.isConnected():
+            self.quotes.cancel_all()
             self.ib.disconnect()
-            logging.info("Disconnected from Interactive Brokers") 
\ No newline at end of file
+            logging.info("Disconnected from Interactive Brokers")
+        self.contracts.close()
+        self.journal.close() 
\ No newline at end of file
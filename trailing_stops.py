@@ -0,0 +1,65 @@
+import asyncio
+import logging
+from request_scheduler import ORDERS, RequestScheduler
+
+logger = logging.getLogger(__name__)
+
+
+class TrailingStopEngine:
+    """Client-side trailing stops: raises resting STP exit orders as positions make new highs.
+
+    The Trader calls ``amend`` with the new stop price of every position
+    whose high-water mark moved the stop up. Amendments are coalesced per
+    contract, so a burst of ticks leaves only the latest price queued, and
+    a flush task sends at most ``max_amends`` order modifications every
+    ``interval`` seconds; anything over the budget waits for the next flush.
+    Modifications go through the scheduler's order lane, and one still
+    queued there for the same order picks up the newer stop price.
+    """
+
+    def __init__(self, ib, exits, interval=0.5, max_amends=20, scheduler=None):
+        self.ib = ib
+        self.scheduler = scheduler or RequestScheduler()
+        self.exits = exits  # conId -> Trades of the position's exit orders, owned by the Trader
+        self.interval = interval
+        self.max_amends = max_amends
+        self.pending = {}  # conId -> stop price waiting to be sent, oldest first
+        self._task = None
+
+    def start(self):
+        if self._task is None:
+            self._task = asyncio.ensure_future(self._run())
+
+    def stop(self):
+        if self._task is not None:
+            self._task.cancel()
+            self._task = None
+
+    def amend(self, con_ids, stop_prices):
+        """Queue new stop prices; a contract already queued keeps its place with the newer price"""
+        for con_id, stop_price in zip(con_ids, stop_prices):
+            self.pending[int(con_id)] = float(stop_price)
+
+    async def _run(self):
+        while True:
+            await asyncio.sleep(self.interval)
+            try:
+                self.flush()
+            except Exception as e:
+                logger.error("Error amending trailing stops: %s", e)
+
+    def flush(self):
+        """Send queued amendments up to the per-interval budget; returns how many orders were modified"""
+        sent = 0
+        while self.pending and sent < self.max_amends:
+            con_id = next(iter(self.pending))
+            stop_price = self.pending.pop(con_id)
+            for trade in self.exits.get(con_id, ()):
+                if trade.order.orderType == 'STP' and trade.isActive() and trade.order.auxPrice < stop_price:
+                    trade.order.auxPrice = stop_price
+                    self.scheduler.call(ORDERS, self.ib.placeOrder, trade.contract, trade.order,
+                                        key=('modify', trade.order.orderId))
+                    sent += 1
+        if sent:
+            logger.info("Raised %s trailing stops, %s contracts still queued", sent, len(self.pending))
+        return sent
@@ -1,35 +1,154 @@
 import re
+import time
 from datetime import datetime
+from operator import itemgetter
+
+# $SPY 6/6 595c @ 3.98, $SPY 6/6/25 592.5P @ 1.10
+DOLLAR_PATTERN = re.compile(
+    r'\$([A-Za-z]{1,6})\s+(\d{1,2})/(\d{1,2})(?:/(\d{2,4}))?\s+(\d+(?:\.\d+)?)([cCpP])\s*@\s*(\d*\.?\d+)'
+)
+# SPY 595C 6/6 3.98, SPY 592.5P 6/6/2025 @ 1.10
+PLAIN_PATTERN = re.compile(
+    r'\b([A-Z]{1,6})\s+(\d+(?:\.\d+)?)([cCpP])\s+(\d{1,2})/(\d{1,2})(?:/(\d{2,4}))?\s+@?\s*(\d*\.?\d+)'
+)
+# Cheap check for the strike/right-then-date shape before running PLAIN_PATTERN
+PLAIN_HINT = re.compile(r'\d[cCpP]\s+\d{1,2}/')
+
+
+class OptionSignal:
+    """A single option signal parsed from a tweet"""
+    FIELDS = ('symbol', 'expiration_date', 'strike_price', 'option_type', 'target_price')
+    __slots__ = FIELDS + ('received_at', 'author')
+
+    def __init__(self, symbol, expiration_date, strike_price, option_type, target_price):
+        self.symbol = symbol
+        self.expiration_date = expiration_date
+        self.strike_price = strike_price
+        self.option_type = option_type  # 'call' or 'put'
+        self.target_price = target_price
+        self.received_at = None  # time.monotonic() when the tweet arrived, if known
+        self.author = None  # ID of the account that tweeted it, if known
+
+    @property
+    def key(self):
+        """Normalized identity of the alert, the same however the tweet was worded"""
+        return (self.symbol.upper(), self.expiry, self.strike, self.right, round(self.target_price, 2))
+
+    @property
+    def expiry(self):
+        """Expiration in IB's YYYYMMDD format"""
+        return self.expiration_date.strftime('%Y%m%d')
+
+    @property
+    def strike(self):
+        return self.strike_price
+
+    @property
+    def right(self):
+        """Option right in IB's 'C'/'P' format"""
+        return 'C' if self.option_type == 'call' else 'P'
+
+    def __eq__(self, other):
+        return isinstance(other, OptionSignal) and all(
+            getattr(self, name) == getattr(other, name) for name in self.FIELDS
+        )
+
+    def __repr__(self):
+        return (f"OptionSignal({self.symbol} {self.expiration_date:%Y-%m-%d} "
+                f"{self.strike_price:g}{self.right} @ {self.target_price})")
+
 
 class TweetParser:
-    @staticmethod
-    def parse_option_signal(tweet_text):
+    def __init__(self):
+        self._year = None
+        self._year_valid_until = 0.0
+        self._dates = {}  # (year, month, day) -> datetime
+
+    def _current_year(self):
+        """Current year, refreshed at most once a minute instead of per tweet"""
+        now = time.time()
+        if now >= self._year_valid_until:
+            self._year = datetime.now().year
+            self._year_valid_until = now + 60
+        return self._year
+
+    def _expiration(self, month, day, year, default_year):
+        if year:
+            year = int(year)
+            if year < 100:
+                year += 2000
+        else:
+            year = default_year or self._current_year()
+        key = (year, int(month), int(day))
+        expiration_date = self._dates.get(key)
+        if expiration_date is None:
+            expiration_date = datetime(*key)  # Raises ValueError for impossible dates
+            self._dates[key] = expiration_date
+        return expiration_date
+
+    def _signal(self, symbol, month, day, year, strike, option_type, price, default_year=None):
+        try:
+            expiration_date = self._expiration(month, day, year, default_year)
+        except ValueError:
+            return None
+        return OptionSignal(
+            symbol.upper(),
+            expiration_date,
+            float(strike),
+            'call' if option_type in 'cC' else 'put',
+            float(price)
+        )
+
+    def parse_all(self, tweet_text, default_year=None):
+        """
+        Parse every option signal in a tweet, returned as a tuple in the order they appear.
+        Supported formats:
+            $SPY 6/6 595c @ 3.98
+            SPY 595C 6/6 3.98
+        Decimal strikes (592.5c) and explicit years (6/6/25, 6/6/2025) are accepted;
+        dates without a year use default_year, or the current year if it is not given.
+        """
+        # Fast reject: every supported format has a month/day date
+        if '/' not in tweet_text:
+            return ()
+
+        found = []
+        if '$' in tweet_text:
+            for match in DOLLAR_PATTERN.finditer(tweet_text):
+                symbol, month, day, year, strike, option_type, price = match.groups()
+                signal = self._signal(symbol, month, day, year, strike, option_type, price, default_year)
+                if signal:
+                    found.append((match.start(), match.end(), signal))
+        if PLAIN_HINT.search(tweet_text):
+            dollar_spans = [(start, end) for start, end, _ in found]
+            for match in PLAIN_PATTERN.finditer(tweet_text):
+                start = match.start()
+                # Skip matches that overlap a $-prefixed signal already found
+                if any(s <= start < e for s, e in dollar_spans):
+                    continue
+                symbol, strike, option_type, month, day, year, price = match.groups()
+                signal = self._signal(symbol, month, day, year, strike, option_type, price, default_year)
+                if signal:
+                    found.append((start, match.end(), signal))
+            if len(found) > 1:
+                found.sort(key=itemgetter(0))
+
+        return tuple(item[2] for item in found)
+
+    def parse_option_signal(self, tweet_text):
         """
         Parse a tweet for stock option signals.
-        Expected format: $SYMBOL MM/DD STRIKEc/p @ PRICE
+        Returns the first signal in the tweet, or None.
         Example: $SPY 6/6 595c @ 3.98
         """
-        # Regular expression to match option signals
-        pattern = r'\$(\w+)\s+(\d+)/(\d+)\s+(\d+)([cp])\s+@\s+(\d+\.?\d*)'
-        match = re.search(pattern, tweet_text)
-        
-        if not match:
-            return None
-            
-        symbol, month, day, strike, option_type, price = match.groups()
-        
-        # Convert to current year
-        current_year = datetime.now().year
-        expiration_date = datetime(current_year, int(month), int(day))
-        
-        return {
-            'symbol': symbol,
-            'expiration_date': expiration_date,
-            'strike_price': float(strike),
-            'option_type': 'call' if option_type == 'c' else 'put',
-            'target_price': float(price)
-        }
-    
+        signals = self.parse_all(tweet_text)
+        return signals[0] if signals else None
+
+    def parse_many(self, texts):
+        """Parse a batch of tweets, returning the tuple of signals found in each"""
+        parse_all = self.parse_all
+        return [parse_all(text) for text in texts]
+
     @staticmethod
     def is_valid_signal(signal):
         """
@@ -37,10 +156,10 @@ class TweetParser:
         """
         if not signal:
             return False
-            
+
         # Check if expiration date is in the future
-        if signal['expiration_date'] <= datetime.now():
+        if signal.expiration_date <= datetime.now():
             return False
-            
+
         # Add more validation rules as needed
-        return True 
\ No newline at end of file
+        return True
@@ -0,0 +1,145 @@
+from collections import OrderedDict
+from requests.adapters import HTTPAdapter
+import logging
+import requests
+import threading
+import time
+
+logger = logging.getLogger(__name__)
+
+SEARCH_URL = "https://api.twitterapi.io/twitter/tweet/advanced_search"
+SINCE_TIME_OVERLAP = 10  # Seconds re-read before the last poll, for tweets indexed late
+
+
+class SeenIds:
+    """Bounded set of recently seen tweet IDs, oldest forgotten first"""
+
+    def __init__(self, max_size=10000):
+        self.max_size = max_size
+        self.ids = OrderedDict()
+
+    def add(self, tweet_id):
+        """Record an ID; returns False if it was already seen"""
+        if tweet_id in self.ids:
+            return False
+        self.ids[tweet_id] = None
+        if len(self.ids) > self.max_size:
+            self.ids.popitem(last=False)
+        return True
+
+
+class TweetPoller:
+    """Incremental twitterapi.io search poller for many users.
+
+    Users are packed into combined ``(from:a OR from:b)`` queries that stay
+    under ``max_query_length``. A poll only asks for tweets since the
+    batch's last complete poll, so one quiet user never widens the window
+    for the rest of the batch. Each user also has a ``since_id`` cursor
+    that filters out tweets already delivered, and results are deduplicated
+    by tweet ID before being passed to ``on_tweet``. All requests share one
+    keep-alive session.
+    """
+
+    def __init__(self, api_key, usernames, on_tweet, interval=60,
+                 max_query_length=500, max_pages=5, seen_size=10000):
+        self.usernames = list(usernames)
+        self.on_tweet = on_tweet
+        self.interval = interval
+        self.max_query_length = max_query_length
+        self.max_pages = max_pages
+        self.cursors = {}  # lowercased username -> newest tweet ID seen
+        self.polled_at = {}  # lowercased username -> time of its batch's last complete poll
+        self.seen = SeenIds(seen_size)
+        self.started_at = int(time.time())  # Never replay tweets from before startup
+        self.session = requests.Session()
+        self.session.headers.update({"X-API-Key": api_key})
+        self.session.mount("https://", HTTPAdapter(pool_connections=1, pool_maxsize=4))
+        self._stop = threading.Event()
+
+    def build_batches(self):
+        """Pack usernames into as few from:a OR from:b clauses as fit the query limit"""
+        # Leave room for the since_time suffix
+        limit = self.max_query_length - 40
+        batches, current, length = [], [], 2
+        for username in self.usernames:
+            clause_length = len(username) + 5 + (4 if current else 0)  # "from:" and " OR "
+            if current and length + clause_length > limit:
+                batches.append(current)
+                current, length = [], 2
+                clause_length -= 4
+            current.append(username)
+            length += clause_length
+        if current:
+            batches.append(current)
+        return batches
+
+    def _query(self, batch):
+        users = " OR ".join(f"from:{username}" for username in batch)
+        since = min(self.polled_at.get(username.lower(), self.started_at) for username in batch)
+        return f"({users}) since_time:{since}"
+
+    def fetch(self, batch):
+        """Fetch every page of new tweets for a batch of users"""
+        params = {"query": self._query(batch), "queryType": "Latest"}
+        polled_at = max(self.started_at, int(time.time()) - SINCE_TIME_OVERLAP)
+        tweets = []
+        for _ in range(self.max_pages):
+            response = self.session.get(SEARCH_URL, params=params, timeout=10)
+            if response.status_code != 200:
+                logger.error("twitterapi.io error: %s - %s", response.status_code, response.text)
+                return tweets
+            data = response.json()
+            tweets.extend(data.get('tweets', []))
+            if not data.get('has_next_page') or not data.get('next_cursor'):
+                break
+            params["cursor"] = data['next_cursor']
+        # Only a poll that got through moves the batch's time cursor
+        for username in batch:
+            self.polled_at[username.lower()] = polled_at
+        return tweets
+
+    def poll_once(self):
+        """Run one poll over every batch; returns the number of new tweets delivered"""
+        delivered = 0
+        for batch in self.build_batches():
+            try:
+                tweets = self.fetch(batch)
+            except requests.RequestException as e:
+                logger.error("Error polling twitterapi.io: %s", e)
+                continue
+
+            # Deliver oldest first so cursors only move forward
+            for tweet in sorted(tweets, key=lambda t: int(t['id'])):
+                tweet_id = int(tweet['id'])
+                username = tweet.get('author', {}).get('userName', '').lower()
+                cursor = self.cursors.get(username)
+                if cursor and tweet_id <= cursor:
+                    continue
+                if username:
+                    self.cursors[username] = tweet_id
+                if not self.seen.add(tweet_id):
+                    continue
+                self.on_tweet(tweet)
+                delivered += 1
+        return delivered
+
+    def run(self):
+        """Poll until stop() is called"""
+        logger.info("Polling twitterapi.io for %s users every %ss", len(self.usernames), self.interval)
+        while not self._stop.is_set():
+            started = time.monotonic()
+            try:
+                self.poll_once()
+            except Exception as e:
+                logger.error("Error in tweet poller: %s", e)
+            self._stop.wait(max(0, self.interval - (time.monotonic() - started)))
+
+    def start(self):
+        """Run the poller on a daemon thread"""
+        thread = threading.Thread(target=self.run, name="tweet-poller", daemon=True)
+        thread.start()
+        return thread
+
+    def stop(self):
+        self._stop.set()
+        self.session.close()